@@ -1,11 +1,19 @@
 # -*- mode: python ; coding: utf-8 -*-
+import os
+import nltk
+
+# Bundle the NLTK tokenizer data so the app never downloads it at runtime
+nltk_data_dir = os.path.join('build', 'nltk_data')
+for package in ('punkt', 'punkt_tab'):
+    if not nltk.download(package, download_dir=nltk_data_dir, quiet=True):
+        raise SystemExit(f"Could not fetch NLTK '{package}' data for bundling")
 
 a = Analysis(
     ['main.py'],
     pathex=[],
     binaries=[],
-    datas=[('web', 'web')],
-    hiddenimports=['sumy.parsers.plaintext', 'sumy.nlp.tokenizers', 'sumy.summarizers.lsa', 'pytesseract', 'PIL', 'docx', 'PyPDF2'],
+    datas=[('web', 'web'), (nltk_data_dir, 'nltk_data')],
+    hiddenimports=['sumy.parsers.plaintext', 'sumy.nlp.tokenizers', 'sumy.summarizers.lsa', 'pytesseract', 'PIL', 'PyPDF2'],
     hookspath=[],
     hooksconfig={},
     runtime_hooks=[],
@@ -0,0 +1,412 @@
+import os
+import json
+import time
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import argparse
+import tempfile
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import webview
+import main
+
+# Per-file sleeps the organizer/undo loops used to have. The "est. before" column
+# adds them to the measured time; the old loops themselves aren't run.
+LEGACY_ORGANIZE_DELAY = 0.05
+LEGACY_RESTORE_DELAY = 0.01
+
+class FakeWindow:
+    """Stands in for the webview window: records JS calls and signals completion"""
+    def __init__(self):
+        self.calls = 0
+        self.done = threading.Event()
+
+    def evaluate_js(self, js):
+        self.calls += 1
+        if js.startswith(('window.cleaningComplete', 'window.undoComplete', 'window.cleaningError')):
+            self.done.set()
+
+def wait_for(window):
+    window.done.wait()
+    window.done.clear()
+
+def make_files(folder, count):
+    exts = ["pdf", "jpg", "zip", "mp4", "mp3", "docx"]
+    for i in range(count):
+        with open(os.path.join(folder, f"file_{i}.{exts[i % len(exts)]}"), 'w') as f:
+            f.write("x")
+
+def report(label, count, seconds, legacy_delay):
+    rate = count / seconds if seconds else float('inf')
+    legacy_rate = count / (seconds + count * legacy_delay)
+    print(f"{label:<10} {count} files in {seconds:.2f}s -> {rate:,.0f} files/s "
+          f"(est. before, adding the old {legacy_delay * 1000:.0f} ms/file sleep: ~{legacy_rate:,.0f} files/s)")
+
+def bench_organize(count):
+    work_dir = tempfile.mkdtemp(prefix="cleaner_bench_")
+    try:
+        target = os.path.join(work_dir, "Downloads")
+        os.makedirs(target)
+        make_files(target, count)
+
+        window = FakeWindow()
+        webview.windows = [window]
+        api = main.create_api(os.path.join(work_dir, "config"))
+        api.set_target_path(target)
+
+        start = time.perf_counter()
+        api.organize_files()
+        wait_for(window)
+        organize_time = time.perf_counter() - start
+        report("organize", count, organize_time, LEGACY_ORGANIZE_DELAY)
+
+        session_id = api.get_history()[0]["id"]
+        start = time.perf_counter()
+        api.restore_session(session_id)
+        wait_for(window)
+        restore_time = time.perf_counter() - start
+        report("undo", count, restore_time, LEGACY_RESTORE_DELAY)
+
+        print(f"UI bridge calls: {window.calls} for {count * 2} file operations")
+        api._shutdown()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+def time_call(func, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        func()
+    return (time.perf_counter() - start) / calls * 1e6
+
+def bench_api(calls):
+    """Latency of the getters/setters the UI calls, vs. re-reading the JSON file each time"""
+    work_dir = tempfile.mkdtemp(prefix="cleaner_bench_")
+    try:
+        config_dir = os.path.join(work_dir, "config")
+        api = main.create_api(config_dir)
+        api.set_target_path(work_dir)
+        api.save_ignore_list([f"*.tmp{i}" for i in range(50)])
+        api.get_rules() # Creates the Default profile
+        api._config.flush()
+
+        settings_file = os.path.join(config_dir, "settings.json")
+        def legacy_read():
+            with open(settings_file, 'r') as f:
+                json.load(f)
+
+        print(f"{'call':<22} {'us/call':>10}")
+        for name, func in [
+            ("json.load (old way)", legacy_read),
+            ("get_target_path", api.get_target_path),
+            ("get_filter_mode", api.get_filter_mode),
+            ("get_active_profile", api.get_active_profile),
+            ("get_rules", api.get_rules),
+            ("get_ignore_list", api.get_ignore_list),
+            ("get_include_list", api.get_include_list),
+            ("set_turbo_mode", lambda: api.set_turbo_mode(True)),
+        ]:
+            print(f"{name:<22} {time_call(func, calls):>10.1f}")
+
+        api._shutdown()
+        print(f"Config store: {api._config.stats()}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# Runs in a fresh interpreter: time from process start to the create_window call
+STARTUP_SCRIPT = """
+import time
+start = time.perf_counter()
+import sys, json, webview
+def create_window(*args, **kwargs):
+    heavy = [m for m in ("nltk", "sumy", "PyPDF2", "docx", "pytesseract", "PIL", "requests", "openai") if m in sys.modules]
+    print(json.dumps({"seconds": time.perf_counter() - start, "heavy": heavy}))
+webview.create_window = create_window
+webview.start = lambda *args, **kwargs: None
+import main
+main.create_app()
+"""
+
+def bench_startup(runs):
+    """Import-to-window time of the app, each run in a new process with an empty home folder"""
+    work_dir = tempfile.mkdtemp(prefix="cleaner_bench_")
+    try:
+        env = dict(os.environ, HOME=work_dir, USERPROFILE=work_dir)
+        app_dir = os.path.dirname(os.path.abspath(__file__))
+        times = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, "-c", STARTUP_SCRIPT], cwd=app_dir, env=env,
+                                    capture_output=True, text=True, check=True).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            times.append(result["seconds"])
+
+        print(f"import-to-window over {runs} runs: median {statistics.median(times) * 1000:.0f} ms, "
+              f"min {min(times) * 1000:.0f} ms, max {max(times) * 1000:.0f} ms")
+        print(f"Heavy modules loaded before the window: {', '.join(result['heavy']) or 'none'}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+class StubLLMHandler(BaseHTTPRequestHandler):
+    """
+    Minimal OpenAI-compatible /chat/completions: files every listed file under
+    its extension, in reverse order, after a random delay. The first attempt
+    of each prompt gets a 429 (Retry-After), so the client has to retry.
+    """
+    def log_message(self, *args):
+        pass
+
+    def _reply(self, status, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in headers:
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        server = self.server
+        request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        prompt = request["messages"][-1]["content"]
+        with server.lock:
+            server.arrivals.append(time.monotonic())
+            first_attempt = prompt not in server.seen
+            server.seen.add(prompt)
+        if first_attempt:
+            server.rejected += 1
+            self._reply(429, {"error": {"message": "slow down"}}, [("Retry-After", "0.05")])
+            return
+
+        files = json.loads(prompt.split("Files to Analyze:", 1)[1].strip().splitlines()[0])
+        suggestions = [{"file": f["name"], "folder": os.path.splitext(f["name"])[1].lstrip(".").upper(), "reason": "stub"}
+                       for f in reversed(files)]
+        content = json.dumps({"suggestions": suggestions})
+        time.sleep(random.uniform(0, server.latency))
+
+        if not request.get("stream"):
+            self._reply(200, {"id": "stub", "object": "chat.completion", "created": 0, "model": request["model"],
+                              "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}]})
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.end_headers()
+        pieces = [content[i:i + 40] for i in range(0, len(content), 40)]
+        for i, piece in enumerate(pieces):
+            chunk = {"id": "stub", "object": "chat.completion.chunk", "created": 0, "model": request["model"],
+                     "choices": [{"index": 0, "delta": {"content": piece}, "finish_reason": "stop" if i == len(pieces) - 1 else None}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+        self.wfile.write(b"data: [DONE]\n\n")
+
+def start_stub_llm(latency):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), StubLLMHandler)
+    server.lock = threading.Lock()
+    server.arrivals = []
+    server.seen = set()
+    server.rejected = 0
+    server.latency = latency
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def bench_ai(count, concurrency, rpm, latency):
+    """
+    Concurrent AI batches against a local stub server: checks that 429s are
+    retried, the request rate stays under requests_per_minute and the merged
+    suggestions come back in file order. Exits non-zero if a check fails.
+    """
+    work_dir = tempfile.mkdtemp(prefix="cleaner_bench_")
+    server = start_stub_llm(latency)
+    try:
+        target = os.path.join(work_dir, "Downloads")
+        os.makedirs(target)
+        make_files(target, count)
+        webview.windows = [FakeWindow()]
+        api = main.create_api(os.path.join(work_dir, "config"))
+        api.set_target_path(target)
+
+        failures = []
+        for stream in (False, True):
+            with server.lock:
+                server.arrivals.clear()
+                server.seen.clear()
+                server.rejected = 0
+            start = time.perf_counter()
+            result = api.run_ai_scan({
+                "base_url": f"http://127.0.0.1:{server.server_address[1]}/v1",
+                "model_name": "stub", "mode": "name_only", "respect_ignore": False,
+                "batch_size": 5, "concurrency": concurrency, "requests_per_minute": rpm,
+                "max_retries": 3, "stream": stream
+            })
+            seconds = time.perf_counter() - start
+            label = "stream" if stream else "plain"
+
+            if "error" in result:
+                failures.append(f"{label}: {result['error']}")
+                continue
+            # run_ai_scan sends files in sorted order; the suggestions must follow it
+            expected = sorted(os.listdir(target))
+            got = [s["file"] for s in result["results"]]
+            batches = -(-count // 5)
+            arrivals = server.arrivals
+            # Token bucket: after the initial burst of `concurrency`, at most rpm/60 requests per second
+            allowed = concurrency + (arrivals[-1] - arrivals[0]) * rpm / 60 + 1
+            print(f"{label:<7} {count} files, {batches} batches, {len(arrivals)} requests "
+                  f"({server.rejected} got 429) in {seconds:.2f}s")
+
+            if got != expected:
+                failures.append(f"{label}: suggestions are not in file order")
+            if result["failed_batches"]:
+                failures.append(f"{label}: failed batches {result['failed_batches']}")
+            if server.rejected != batches or len(arrivals) != 2 * batches:
+                failures.append(f"{label}: expected every batch to be retried once after its 429")
+            if len(arrivals) > allowed:
+                failures.append(f"{label}: {len(arrivals)} requests exceed the {rpm}/min rate limit")
+
+        api._shutdown()
+        for failure in failures:
+            print(f"FAIL {failure}")
+        if failures:
+            sys.exit(1)
+        print("OK: 429 retry, rate limit and ordered merge")
+    finally:
+        server.shutdown()
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+# Fixture corpus for the summarizer benchmark: sentences per topic, file names carry no hint
+SUMMARY_TOPICS = {
+    "Finance": [
+        "The invoice total is due within thirty days of the billing date.",
+        "Quarterly revenue grew while operating expenses stayed flat.",
+        "Please transfer the outstanding balance to the account listed below.",
+        "The tax return includes deductions for depreciation and interest.",
+        "Our budget forecast assumes a modest increase in payroll costs.",
+    ],
+    "Cooking": [
+        "Preheat the oven and whisk the eggs with sugar until pale.",
+        "Simmer the tomato sauce with garlic and fresh basil for twenty minutes.",
+        "Knead the dough until smooth, then let it rise in a warm place.",
+        "Season the chicken with salt, pepper and smoked paprika before roasting.",
+        "Serve the soup hot with a drizzle of olive oil and crusty bread.",
+    ],
+    "Travel": [
+        "Your flight departs from terminal two, boarding begins an hour earlier.",
+        "The hotel reservation includes breakfast and late checkout.",
+        "Remember to bring your passport and the printed visa confirmation.",
+        "The train to the coast leaves every morning from the central station.",
+        "Our itinerary covers three cities and a guided tour of the old town.",
+    ],
+    "Programming": [
+        "The function returns a list of parsed tokens or raises a syntax error.",
+        "Run the unit tests before merging the branch into main.",
+        "The server caches responses and retries failed requests with backoff.",
+        "Refactor the module so the database connection is reused across calls.",
+        "Compile the project with optimizations enabled and profile the hot loop.",
+    ],
+    "Health": [
+        "Take one tablet twice a day with food for the next two weeks.",
+        "Your blood pressure reading was slightly above the normal range.",
+        "The physiotherapist recommends daily stretching and light exercise.",
+        "Schedule a follow-up appointment to review the test results.",
+        "Drink plenty of water and get enough sleep during recovery.",
+    ],
+}
+FILLER = [
+    "This document was last updated recently.",
+    "Please keep a copy for your records.",
+    "Contact us if anything is unclear.",
+]
+
+def make_summary_corpus(folder, files_per_topic, seed=7):
+    rng = random.Random(seed)
+    labels = {}
+    index = 0
+    for topic, sentences in SUMMARY_TOPICS.items():
+        for _ in range(files_per_topic):
+            paragraphs = []
+            for _ in range(rng.randint(4, 12)):
+                picks = rng.choices(sentences, k=rng.randint(2, 5)) + rng.sample(FILLER, 1)
+                rng.shuffle(picks)
+                paragraphs.append(" ".join(picks))
+            name = f"doc_{index:03d}.txt"
+            with open(os.path.join(folder, name), 'w') as f:
+                f.write("\n\n".join(paragraphs))
+            labels[name] = topic
+            index += 1
+    return labels
+
+def classify_with_ai(client, model_name, summaries):
+    """One request per tier; returns {file: folder}"""
+    files = [{"name": name, "summary": summary} for name, summary in summaries.items()]
+    instructions = f"Put every file into exactly one of these folders: {', '.join(SUMMARY_TOPICS)}. Use the summary, the names carry no meaning."
+    prompt = main.build_ai_prompt(instructions, False, [], files)
+    suggestions, _ = main.request_suggestions(client, model_name, prompt, max_retries=3)
+    return {s.get("file"): s.get("folder") for s in suggestions}
+
+def bench_summarize(files_per_topic, api_key=None, base_url=None, model_name=None):
+    """Per-file latency of each summarizer tier, and (with an API key) how the AI's folder choices compare"""
+    work_dir = tempfile.mkdtemp(prefix="cleaner_bench_")
+    try:
+        labels = make_summary_corpus(work_dir, files_per_topic)
+        contents = {name: main.extract_content(os.path.join(work_dir, name)) for name in labels}
+
+        summaries = {}
+        print(f"{'tier':<6} {'ms/file':>10}  ({len(contents)} files)")
+        for tier, summarize in main.SUMMARIZERS.items():
+            try:
+                if tier == "lsa" and not main.ensure_nltk_data():
+                    print(f"{tier:<6} {'n/a':>10}  (NLTK punkt data not installed)")
+                    continue
+                start = time.perf_counter()
+                summaries[tier] = {name: summarize(text) for name, text in contents.items()}
+            except ImportError as e:
+                print(f"{tier:<6} {'n/a':>10}  ({e})")
+                continue
+            per_file = (time.perf_counter() - start) / len(contents) * 1000
+            print(f"{tier:<6} {per_file:>10.3f}")
+
+        if not api_key:
+            print("Pass --api-key (and --base-url/--model) to compare the AI's classification per tier")
+            return
+
+        clients = main.ClientManager()
+        client = clients.get_openai(api_key, base_url)
+        choices = {tier: classify_with_ai(client, model_name, tier_summaries) for tier, tier_summaries in summaries.items()}
+        baseline = "lsa" if "lsa" in choices else next(iter(choices))
+        print(f"{'tier':<6} {'accuracy':>9} {'agrees w/ ' + baseline:>14}")
+        for tier, folders in choices.items():
+            correct = sum(1 for name, topic in labels.items() if (folders.get(name) or "").lower() == topic.lower())
+            agree = sum(1 for name in labels if (folders.get(name) or "").lower() == (choices[baseline].get(name) or "").lower())
+            print(f"{tier:<6} {correct / len(labels):>9.0%} {agree / len(labels):>14.0%}")
+        clients.close()
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="System Cleaner micro-benchmarks")
+    parser.add_argument("benchmark", choices=["organize", "api", "startup", "summarize", "ai"])
+    parser.add_argument("--files", type=int) # organize: 2000, ai: 60
+    parser.add_argument("--calls", type=int, default=10000)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--per-topic", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rpm", type=int, default=600)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--api-key")
+    parser.add_argument("--base-url", default="https://api.sambanova.ai/v1")
+    parser.add_argument("--model", default="Meta-Llama-3.1-8B-Instruct")
+    args = parser.parse_args()
+
+    if args.benchmark == "organize":
+        bench_organize(args.files or 2000)
+    elif args.benchmark == "api":
+        bench_api(args.calls)
+    elif args.benchmark == "startup":
+        bench_startup(args.runs)
+    elif args.benchmark == "summarize":
+        bench_summarize(args.per_topic, args.api_key, args.base_url, args.model)
+    elif args.benchmark == "ai":
+        bench_ai(args.files or 60, args.concurrency, args.rpm, args.latency)
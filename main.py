@@ -4,48 +4,2258 @@ import sys
 import shutil
 import time
 import threading
+import random
+import multiprocessing
 import json
+import sqlite3
+import hashlib
 import fnmatch
 import re
-import requests
-import nltk
-import ssl
-import PyPDF2
-import docx
-import pytesseract
-from PIL import Image
-
-# SSL Hack for NLTK download (Mac specific usually)
-try:
-    _create_unverified_https_context = ssl._create_unverified_context
-except AttributeError:
-    pass
-else:
-    ssl._create_default_https_context = _create_unverified_https_context
-
-# Download NLTK data
-nltk.download('punkt', quiet=True)
-nltk.download('punkt_tab', quiet=True)
-
-from sumy.parsers.plaintext import PlaintextParser
-from sumy.nlp.tokenizers import Tokenizer
-from sumy.summarizers.lsa import LsaSummarizer
+import math
+import stat
+import queue
+import select
+import struct
+import ctypes
+import ctypes.util
+import argparse
+from collections import namedtuple, Counter, deque
+from concurrent.futures import ThreadPoolExecutor, Future, as_completed, wait, FIRST_COMPLETED
+import zipfile
+import mimetypes
+import xml.etree.ElementTree as ElementTree
+from html.parser import HTMLParser
+# Heavy backends (requests, PyPDF2, pytesseract, PIL, nltk, sumy) are
+# imported on first use, so name-only scans and plain organizing never load them
 
-def create_app():
-    # Determine the path to the web directory
+# Lightweight record for a file in the target folder.
+# mtime is st_mtime_ns; size/mtime are None when not stat'ed.
+# inode is only filled in when asked for (with_inode): it comes with the directory
+# listing on POSIX, but costs a stat per file on Windows.
+FileEntry = namedtuple('FileEntry', ['name', 'path', 'size', 'mtime', 'is_file', 'inode'], defaults=(None,))
+
+def list_files(folder, with_stat=True, with_inode=False):
+    """
+    Lists the visible regular files of a folder with a single os.scandir pass.
+    The type check comes from the cached DirEntry data, and each file is stat'ed
+    at most once (only when with_stat is True).
+    """
+    entries = []
+    with os.scandir(folder) as it:
+        for entry in it:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if not entry.is_file():
+                    continue
+                if with_stat:
+                    st = entry.stat()
+                    entries.append(FileEntry(entry.name, entry.path, st.st_size, st.st_mtime_ns, True, st.st_ino if with_inode else None))
+                else:
+                    entries.append(FileEntry(entry.name, entry.path, None, None, True, entry.inode() if with_inode else None))
+            except OSError:
+                # Vanished or unreadable entry (e.g. broken link, cloud placeholder)
+                continue
+    return entries
+
+def walk_files(folder, max_depth=None, skip_dirs=(), with_stat=False, with_inode=False):
+    """
+    Generator version of list_files for recursive mode: yields FileEntry for the
+    visible files under folder, one os.scandir handle at a time, so memory
+    depends on the number of directories waiting to be visited, not on the
+    number of files. Directories deeper than max_depth (the top level is depth 0)
+    and anything in skip_dirs are not entered. Symlinked directories are not
+    followed, so files outside the folder are never picked up (and moved);
+    each (device, inode) is still visited only once in case of bind mounts.
+    """
+    skip = set(os.path.normcase(os.path.realpath(d)) for d in skip_dirs)
+    visited = set()
+    stack = [(folder, 0)]
+
+    while stack:
+        path, depth = stack.pop()
+        try:
+            st = os.stat(path)
+        except OSError:
+            continue
+        if (st.st_dev, st.st_ino) in visited:
+            continue
+        visited.add((st.st_dev, st.st_ino))
+
+        subdirs = []
+        try:
+            with os.scandir(path) as it:
+                for entry in it:
+                    if entry.name.startswith('.'):
+                        continue
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            if max_depth is None or depth < max_depth:
+                                subdirs.append(entry.path)
+                        elif entry.is_file():
+                            if with_stat:
+                                st = entry.stat()
+                                yield FileEntry(entry.name, entry.path, st.st_size, st.st_mtime_ns, True, st.st_ino if with_inode else None)
+                            else:
+                                yield FileEntry(entry.name, entry.path, None, None, True, entry.inode() if with_inode else None)
+                    except OSError:
+                        continue
+        except OSError:
+            # Unreadable directory (permissions, vanished mid-walk)
+            continue
+
+        # Checked after the listing: destination folders may only appear during the run
+        for subdir in reversed(subdirs):
+            if os.path.normcase(os.path.realpath(subdir)) not in skip:
+                stack.append((subdir, depth + 1))
+
+class CompiledRules:
+    """
+    Pre-indexed view of a rule list.
+    Extensions map straight to the first rule that declares them (first match wins),
+    and "($)" filename patterns are compiled once instead of per file.
+    """
+    def __init__(self, rules):
+        self.rules = rules
+        self.signature = json.dumps(rules, sort_keys=True)
+        self.by_ext = {}
+        self.patterns = {}
+
+        for index, rule in enumerate(rules):
+            for e in rule.get('extensions', []):
+                # setdefault keeps the earliest rule for an extension
+                self.by_ext.setdefault(e.lower().lstrip('.'), index)
+
+            pattern = rule.get('filename_pattern', '')
+            if pattern and '($)' in pattern:
+                # Convert "date($)file" to regex "date(.*)file"
+                parts = pattern.split('($)')
+                self.patterns[index] = re.compile('(.*)'.join([re.escape(p) for p in parts]))
+
+    def classify(self, filename):
+        """
+        Returns the target folder (relative or absolute) for a filename,
+        or None if no rule matches.
+        """
+        _, ext = os.path.splitext(filename)
+        index = self.by_ext.get(ext.lower().lstrip('.'))
+        if index is None:
+            return None
+
+        target_folder = self.rules[index].get('folder', 'Misc')
+        regex = self.patterns.get(index)
+        if regex is None:
+            return target_folder
+
+        extracted = None
+
+        # 1. Try match against base filename first (avoids capturing extension)
+        base_name, _ = os.path.splitext(filename)
+        match = regex.search(base_name)
+        if match:
+            groups = match.groups()
+            if groups:
+                extracted = " ".join([g.strip() for g in groups if g])
+
+        # 2. If no match, try full filename (in case pattern includes extension)
+        if not extracted:
+            match = regex.search(filename)
+            if match:
+                groups = match.groups()
+                if groups:
+                    extracted = " ".join([g.strip() for g in groups if g])
+
+        if extracted:
+            # Append extracted value as subfolder
+            target_folder = os.path.join(target_folder, extracted)
+
+        return target_folder
+
+class FileFilter:
+    """
+    Ignore/Include patterns compiled for bulk filtering.
+    Literal names and "*.ext" patterns are answered from sets, everything else
+    goes through one combined regex. Matches fnmatch.fnmatch semantics.
+    """
+    def __init__(self, mode, ignore_patterns, include_patterns):
+        self.mode = mode
+        patterns = ignore_patterns if mode == "exclude" else include_patterns
+
+        self.literals = set()
+        self.suffixes = set()
+        regex_parts = []
+
+        for pattern in patterns:
+            pattern = os.path.normcase(pattern)
+            if not any(c in pattern for c in '*?['):
+                self.literals.add(pattern)
+            elif pattern.startswith('*.') and not any(c in pattern[1:] for c in '*?['):
+                self.suffixes.add(pattern[1:]) # '.pdf'
+            else:
+                regex_parts.append(f"(?:{fnmatch.translate(pattern)})")
+
+        self.regex = re.compile('|'.join(regex_parts)) if regex_parts else None
+
+    def matches(self, name):
+        """True if the name matches any of the active patterns"""
+        name = os.path.normcase(name)
+        if name in self.literals:
+            return True
+
+        if self.suffixes:
+            # "*" also matches the empty string, so try every ".xxx" tail
+            i = name.find('.')
+            while i != -1:
+                if name[i:] in self.suffixes:
+                    return True
+                i = name.find('.', i + 1)
+
+        return self.regex is not None and self.regex.match(name) is not None
+
+    def allows(self, name):
+        """True if the file should be processed under the current filter mode"""
+        if self.mode == "exclude":
+            return not self.matches(name)
+        return self.matches(name)
+
+# Content-mode budget: only this much text is extracted and summarized per file
+CONTENT_MAX_CHARS = 10000
+CONTENT_MAX_LINES = 400
+TEXT_CHUNK_SIZE = 64 * 1024
+
+# Control characters that might break JSON later (newlines and tabs are kept)
+_CONTROL_CHARS = dict.fromkeys(c for c in range(32) if c not in (9, 10))
+
+def sanitize_text(text):
+    return text.translate(_CONTROL_CHARS)
+
+class TextBudget:
+    """
+    Collects extracted text until max_chars or max_lines is reached, so
+    extractors can stop reading early and keep the head of a huge file
+    instead of loading all of it.
+    """
+    def __init__(self, max_chars=CONTENT_MAX_CHARS, max_lines=CONTENT_MAX_LINES):
+        self.max_chars = max_chars
+        self.max_lines = max_lines
+        self.parts = []
+        self.chars = 0
+        self.lines = 0
+        self.truncated = False
+
+    def add(self, text):
+        """Adds (sanitized) text; returns True once the budget is used up"""
+        if self.truncated:
+            return True
+        text = sanitize_text(text)
+
+        room = self.max_chars - self.chars
+        if len(text) > room:
+            text = text[:room]
+            self.truncated = True
+
+        newlines = text.count('\n')
+        if self.lines + newlines > self.max_lines:
+            # Cut just before the newline that would go over the line budget
+            cut = -1
+            for _ in range(self.max_lines - self.lines + 1):
+                cut = text.find('\n', cut + 1)
+            text = text[:cut]
+            newlines = self.max_lines - self.lines
+            self.truncated = True
+
+        self.parts.append(text)
+        self.chars += len(text)
+        self.lines += newlines
+        return self.truncated
+
+    def text(self):
+        return "".join(self.parts)
+
+# --- Text extractors ---
+# Each extractor is fn(file_path, budget) and feeds text into the TextBudget
+# until it reports full. Heavy libraries are imported inside the extractor.
+
+_EXTRACTORS = {}
+
+def register_extractor(keys, extractor):
+    """
+    Registers extractor(file_path, budget) for extensions (".xlsx") or MIME
+    types ("application/epub+zip", or "text/*" for a whole family).
+    """
+    for key in keys:
+        _EXTRACTORS[key.lower()] = extractor
+
+def get_extractor(file_path):
+    """Extension first, then the guessed MIME type, then its family (text/*)"""
+    ext = os.path.splitext(file_path)[1].lower()
+    extractor = _EXTRACTORS.get(ext)
+    if extractor is None:
+        mime = mimetypes.guess_type(file_path)[0]
+        if mime:
+            extractor = _EXTRACTORS.get(mime) or _EXTRACTORS.get(mime.split('/')[0] + "/*")
+    return extractor
+
+def _extract_text_file(file_path, budget):
+    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
+        for chunk in iter(lambda: f.read(TEXT_CHUNK_SIZE), ''):
+            if budget.add(chunk):
+                break
+
+def _extract_pdf(file_path, budget):
+    import PyPDF2
+    with open(file_path, 'rb') as f:
+        reader = PyPDF2.PdfReader(f)
+        # Read max 5 pages to stay within limits roughly
+        for i in range(min(len(reader.pages), 5)):
+            page_text = reader.pages[i].extract_text()
+            if page_text and budget.add(page_text + "\n"):
+                break
+
+def _extract_docx(file_path, budget):
+    # Streamed like the other zipped-XML formats; python-docx would parse the whole document first
+    _extract_zipped_xml(file_path, budget, r'word/document\.xml', {'p'})
+
+# --- OCR ---
+# Images go through a cheap "could this have text?" check, are decoded at a
+# reduced size (about 300 DPI for a page) and only the first frame is read.
+# Results are cached by file content, so a photo that was moved, renamed or
+# copied is never OCR'ed twice.
+
+OCR_MAX_SIDE = 3508        # A4 at 300 DPI; anything bigger is downscaled
+OCR_TARGET_DPI = 300
+OCR_MIN_SIDE = 48          # Icons and thumbnails
+OCR_MAX_ASPECT = 15        # Banners, separators
+OCR_TIMEOUT = 20           # Seconds per image (tesseract is killed after that)
+# LSTM engine, automatic page layout, and no second pass looking for white-on-black text
+OCR_CONFIG = "--oem 1 --psm 3 -c tessedit_do_invert=0"
+OCR_CACHE_VERSION = 1
+
+class OcrCache:
+    """
+    SQLite cache of OCR output keyed by the image's content hash.
+    Opened by each extraction worker process, so it uses WAL and a busy timeout.
+    """
+    def __init__(self, db_path, max_bytes=20 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, timeout=10, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Bumped when the OCR settings change what comes out
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < OCR_CACHE_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS ocr_cache")
+            self._conn.execute(f"PRAGMA user_version = {OCR_CACHE_VERSION}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS ocr_cache (
+                content_hash TEXT PRIMARY KEY,
+                text TEXT,
+                bytes INTEGER,
+                last_used REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_ocr_cache_lru ON ocr_cache(last_used)")
+        self._conn.commit()
+
+    def get(self, content_hash):
+        """Returns the cached text ("" for images without text), or None on a miss"""
+        with self._lock:
+            row = self._conn.execute("SELECT text FROM ocr_cache WHERE content_hash = ?", (content_hash,)).fetchone()
+            if row is not None:
+                self._conn.execute("UPDATE ocr_cache SET last_used = ? WHERE content_hash = ?", (time.time(), content_hash))
+                self._conn.commit()
+                return row[0]
+        return None
+
+    def put(self, content_hash, text):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO ocr_cache VALUES (?, ?, ?, ?)",
+                (content_hash, text, len(content_hash) + len(text.encode('utf-8')), time.time())
+            )
+            total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM ocr_cache").fetchone()[0]
+            if total > self.max_bytes:
+                # Drop the oldest quarter rather than trimming on every insert
+                self._conn.execute(
+                    "DELETE FROM ocr_cache WHERE content_hash IN "
+                    "(SELECT content_hash FROM ocr_cache ORDER BY last_used ASC LIMIT "
+                    "(SELECT COUNT(*) / 4 + 1 FROM ocr_cache))"
+                )
+            self._conn.commit()
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM ocr_cache")
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+# Per process: set in the main process for inline extraction and by the
+# pool initializer in each worker
+_ocr = {"cache": None, "cache_path": None, "timeout": OCR_TIMEOUT}
+
+def configure_ocr(cache_path=None, timeout=OCR_TIMEOUT):
+    """Points this process's OCR at a cache file (None = no cache) and sets the tesseract timeout"""
+    _ocr["timeout"] = timeout
+    if cache_path == _ocr["cache_path"]:
+        return
+    if _ocr["cache"] is not None:
+        _ocr["cache"].close()
+    _ocr["cache"] = None
+    _ocr["cache_path"] = cache_path
+    if cache_path:
+        try:
+            _ocr["cache"] = OcrCache(cache_path)
+        except sqlite3.Error as e:
+            print(f"OCR cache unavailable: {e}")
+
+def _ocr_size(image):
+    """Size to OCR at: the image's DPI brought down to OCR_TARGET_DPI, and never above OCR_MAX_SIDE"""
+    width, height = image.size
+    scale = 1.0
+    dpi = image.info.get('dpi')
+    try:
+        dpi = float(dpi[0]) if dpi else 0
+    except (TypeError, ValueError, IndexError):
+        dpi = 0
+    if dpi > OCR_TARGET_DPI:
+        scale = OCR_TARGET_DPI / dpi
+    scale = min(scale, OCR_MAX_SIDE / max(width, height))
+    return (max(1, int(width * scale)), max(1, int(height * scale)))
+
+def _fits_ocr(size):
+    """Icons and banners are too small or too thin to hold readable text"""
+    width, height = size
+    return min(width, height) >= OCR_MIN_SIDE and max(width, height) / min(width, height) <= OCR_MAX_ASPECT
+
+def _likely_has_text(image):
+    """
+    Cheap check on a small grayscale copy: text means sharp, high-contrast
+    edges. Blank, flat or blurry images (skies, gradients, empty scans) are
+    skipped; a single line of text on a page still passes.
+    """
+    from PIL import ImageFilter
+
+    small = image.copy()
+    small.thumbnail((1024, 1024))
+    # FIND_EDGES lights up the outer frame, so leave it out
+    edges = small.filter(ImageFilter.FIND_EDGES).crop((1, 1, small.width - 1, small.height - 1))
+    histogram = edges.histogram()
+    return sum(histogram[128:]) / max(1, sum(histogram)) > 0.0005
+
+def ocr_image(file_path):
+    """Returns the text in an image ("" when there is none), using the OCR cache when configured"""
+    cache = _ocr["cache"]
+    content_hash = file_hash(file_path) if cache is not None else None
+    if content_hash:
+        cached = cache.get(content_hash)
+        if cached is not None:
+            return cached
+
+    import pytesseract
+    from PIL import Image
+
+    gray = None
+    with Image.open(file_path) as image:
+        # Only the header has been read so far: rule out icons and banners before decoding
+        if _fits_ocr(image.size):
+            # Multi-page TIFFs: first frame only (Image.open already sits on it)
+            target = _ocr_size(image)
+            # JPEGs can decode straight at 1/2, 1/4 or 1/8 scale, far cheaper than a full decode
+            image.draft('L', target)
+            gray = image.convert('L')
+
+    text = ""
+    if gray is not None and _likely_has_text(gray):
+        if gray.size != target:
+            gray = gray.resize(target, Image.LANCZOS)
+        # A timeout raises (RuntimeError): maybe just a busy machine, so it's neither
+        # cached here nor, as a failed extraction, in the content cache
+        text = pytesseract.image_to_string(gray, config=OCR_CONFIG, timeout=_ocr["timeout"])
+
+    if content_hash:
+        cache.put(content_hash, text)
+    return text
+
+def _extract_image(file_path, budget):
+    budget.add(ocr_image(file_path))
+
+def _natural_key(name):
+    return [int(part) if part.isdigit() else part for part in re.split(r'(\d+)', name)]
+
+def _extract_zipped_xml(file_path, budget, member_pattern, paragraph_tags):
+    """
+    Office formats that are a zip of XML parts (xlsx, pptx, odt): streams the
+    matching parts in natural order and adds the text of each paragraph element.
+    """
+    with zipfile.ZipFile(file_path) as archive:
+        members = sorted((n for n in archive.namelist() if re.fullmatch(member_pattern, n)), key=_natural_key)
+        for member in members:
+            with archive.open(member) as f:
+                for _, elem in ElementTree.iterparse(f):
+                    if elem.tag.rsplit('}', 1)[-1] in paragraph_tags:
+                        if budget.add("".join(elem.itertext()) + "\n"):
+                            return
+                        elem.clear()
+
+def _extract_xlsx(file_path, budget):
+    # Cell text lives in the shared strings table (numbers are skipped)
+    _extract_zipped_xml(file_path, budget, r'xl/sharedStrings\.xml', {'si'})
+
+def _extract_pptx(file_path, budget):
+    _extract_zipped_xml(file_path, budget, r'ppt/slides/slide\d+\.xml', {'p'})
+
+def _extract_odf(file_path, budget):
+    _extract_zipped_xml(file_path, budget, r'content\.xml', {'p', 'h'})
+
+class _HTMLText(HTMLParser):
+    """Collects the visible text of (X)HTML into a TextBudget"""
+    def __init__(self, budget):
+        super().__init__()
+        self.budget = budget
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in ('script', 'style'):
+            self._skip += 1
+
+    def handle_endtag(self, tag):
+        if tag in ('script', 'style'):
+            self._skip = max(0, self._skip - 1)
+        elif tag in ('p', 'div', 'br', 'li', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6'):
+            self.budget.add("\n")
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.budget.add(data)
+
+def _extract_epub(file_path, budget):
+    with zipfile.ZipFile(file_path) as archive:
+        members = sorted((n for n in archive.namelist() if n.lower().endswith(('.xhtml', '.html', '.htm'))), key=_natural_key)
+        for member in members:
+            parser = _HTMLText(budget)
+            with archive.open(member) as f:
+                for chunk in iter(lambda: f.read(TEXT_CHUNK_SIZE), b''):
+                    parser.feed(chunk.decode('utf-8', errors='ignore'))
+                    if budget.truncated:
+                        return
+            parser.close()
+
+register_extractor(['.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.c', '.cpp', '.h', '.java', 'text/*'], _extract_text_file)
+register_extractor(['.pdf'], _extract_pdf)
+register_extractor(['.docx'], _extract_docx)
+register_extractor(['.jpg', '.jpeg', '.png', '.bmp', '.tiff'], _extract_image)
+register_extractor(['.xlsx'], _extract_xlsx)
+register_extractor(['.pptx'], _extract_pptx)
+register_extractor(['.odt', '.ods', '.odp'], _extract_odf)
+register_extractor(['.epub'], _extract_epub)
+
+def extract_content(file_path, size=None, max_chars=CONTENT_MAX_CHARS, max_lines=CONTENT_MAX_LINES, strict=False):
+    """
+    Extracts text content using the extractor registered for the file type.
+    Returns text string or None if extraction failed/unsupported.
+    At most max_chars / max_lines are returned: extractors stop as soon as the
+    budget is full, and a longer file yields its head.
+    Pass the size when it is already known to skip the extra stat.
+    With strict=True a failure (locked file, missing backend, ...) raises
+    instead, so callers can tell it apart from a file without text.
+    """
+    try:
+        # Check if file is accessible/valid size
+        if size is None:
+            if not os.path.exists(file_path):
+                return None
+            size = os.path.getsize(file_path)
+        if size == 0:
+            return None
+
+        extractor = get_extractor(file_path)
+        if extractor is None:
+            return None
+
+        budget = TextBudget(max_chars, max_lines)
+        try:
+            extractor(file_path, budget)
+        except Exception as e:
+            if strict:
+                raise
+            print(f"Extraction error for {file_path}: {e}")
+            return None
+        return budget.text() or None
+    except Exception as e:
+        if strict:
+            raise
+        # Silently fail for individual files (e.g. cloud placeholders, locked files)
+        # print(f"Extraction error for {file_path}: {e}")
+        return None
+
+# Tokenizer data the summarizer needs. Frozen builds ship it (see the .spec files);
+# source installs get it downloaded in the background on the first content scan.
+NLTK_PACKAGES = {'punkt': 'tokenizers/punkt', 'punkt_tab': 'tokenizers/punkt_tab'}
+NLTK_USER_DATA = os.path.join(os.path.expanduser("~"), ".system_cleaner", "nltk_data")
+NLTK_RECHECK_SECONDS = 30
+
+_nltk_ready = False
+_nltk_checked_at = None
+_nltk_download_thread = None
+
+def _nltk_data_dirs():
+    dirs = [NLTK_USER_DATA]
     if getattr(sys, 'frozen', False):
-        base_path = sys._MEIPASS
-    else:
-        base_path = os.path.dirname(os.path.abspath(__file__))
+        dirs.insert(0, os.path.join(sys._MEIPASS, 'nltk_data'))
+    return dirs
+
+def ensure_nltk_data(recheck=False):
+    """
+    True when the punkt tokenizer data is available locally. Never touches the
+    network. A positive answer is cached for the process; a negative one is
+    re-checked every NLTK_RECHECK_SECONDS (a background download may land),
+    or right away with recheck=True.
+    """
+    global _nltk_ready, _nltk_checked_at
+    if _nltk_ready:
+        return True
+    if (not recheck and _nltk_checked_at is not None
+            and time.monotonic() - _nltk_checked_at < NLTK_RECHECK_SECONDS):
+        return False
+    _nltk_checked_at = time.monotonic()
+
+    import nltk
+    for data_dir in _nltk_data_dirs():
+        if data_dir not in nltk.data.path:
+            nltk.data.path.insert(0, data_dir)
+    try:
+        for resource in NLTK_PACKAGES.values():
+            nltk.data.find(resource)
+        _nltk_ready = True
+    except LookupError:
+        _nltk_ready = False
+    return _nltk_ready
+
+def start_nltk_download():
+    """
+    Downloads the tokenizer data on a background thread (once per process) if it
+    isn't available. Uses normal, verified HTTPS; until it lands, summaries fall
+    back to the head of the text.
+    """
+    global _nltk_download_thread
+    if ensure_nltk_data() or _nltk_download_thread is not None:
+        return _nltk_download_thread
+
+    def download():
+        global _nltk_checked_at
+        import nltk
+        try:
+            for package in NLTK_PACKAGES:
+                nltk.download(package, download_dir=NLTK_USER_DATA, quiet=True, raise_on_error=True)
+        except Exception as e:
+            print(f"NLTK data download failed: {e}")
+        _nltk_checked_at = None # Look again on the next check
+
+    _nltk_download_thread = threading.Thread(target=download, daemon=True)
+    _nltk_download_thread.start()
+    return _nltk_download_thread
+
+# --- Summarizers ---
+# Content mode sends at most SUMMARY_MAX_CHARS of summary per file. Tiers:
+#   "fast": lead sentences + TF-IDF keywords (pure Python, no NLTK data needed)
+#   "lsa":  sumy's LSA summarizer (an SVD per document)
+#   "head": the first SUMMARY_MAX_CHARS of the text, whitespace collapsed
+SUMMARY_MAX_CHARS = 400
+DEFAULT_SUMMARIZER = "lsa"
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+|\n\s*\n')
+_WORD = re.compile(r"[A-Za-z][A-Za-z'-]{2,}")
+_STOP_WORDS = frozenset("""
+    the and for are but not you all any can had her was one our out has him his how its may new now old see two
+    way who did get got let put say she too use that with have this will your from they know want been good much
+    some time very when come here just like long make many more only over such take than them well were what
+    which while would there their about after again also because before being between both could does doing
+    down during each few further into most other same should so then these those through under until upon where
+    why yours itself themselves page file http https www com
+""".split())
+
+def summarize_head(content):
+    return " ".join(content.split())[:SUMMARY_MAX_CHARS]
+
+def summarize_fast(content, lead_sentences=3, keywords=8):
+    """
+    Lead sentences plus the top TF-IDF keywords, treating each sentence as a
+    document for the IDF part. Linear in the text size, no models to load.
+    """
+    sentences = [" ".join(part.split()) for part in _SENTENCE_SPLIT.split(content)]
+    sentences = [sentence for sentence in sentences if sentence]
+    if not sentences:
+        return None
+
+    term_counts = Counter()
+    sentence_counts = Counter()
+    for sentence in sentences:
+        words = [w for w in (w.lower() for w in _WORD.findall(sentence)) if w not in _STOP_WORDS]
+        term_counts.update(words)
+        sentence_counts.update(set(words))
+
+    n = len(sentences)
+    scores = {w: count * (1 + math.log(n / sentence_counts[w])) for w, count in term_counts.items()}
+    top = sorted(scores, key=lambda w: (-scores[w], w))[:keywords]
+
+    summary = " ".join(sentences[:lead_sentences])
+    if top:
+        summary = f"Keywords: {', '.join(top)}. {summary}"
+    return summary[:SUMMARY_MAX_CHARS]
+
+_lsa = None
+
+def summarize_lsa(content, sentences=5):
+    """sumy LSA; the parser class, tokenizer and summarizer are built once per process"""
+    global _lsa
+    if _lsa is None:
+        from sumy.parsers.plaintext import PlaintextParser
+        from sumy.nlp.tokenizers import Tokenizer
+        from sumy.summarizers.lsa import LsaSummarizer
+        _lsa = (PlaintextParser, Tokenizer("english"), LsaSummarizer())
+    parser_class, tokenizer, summarizer = _lsa
+
+    document = parser_class.from_string(content, tokenizer).document
+    summary_text = " ".join([str(s) for s in summarizer(document, sentences)])
+    return summary_text[:SUMMARY_MAX_CHARS]
+
+SUMMARIZERS = {"fast": summarize_fast, "lsa": summarize_lsa, "head": summarize_head}
+
+def analyze_file(file_path, size=None, summarizer=DEFAULT_SUMMARIZER, nltk_ready=False):
+    """
+    Content-mode work for one file: extract (up to the content budget), summarize
+    with the given tier (see SUMMARIZERS).
+    nltk_ready: the caller already found the tokenizer data, so a head-of-text
+    fallback here would end up cached as the final summary.
+    Returns (text_digest, summary); either may be None when there is no usable content.
+    Returns None when extraction failed, so the result isn't cached.
+    The digest covers the extracted text only (the head, for long files).
+    Module-level so it can run in a worker process.
+    """
+    try:
+        content = extract_content(file_path, size, strict=True)
+    except Exception as e:
+        print(f"Extraction error for {file_path}: {e}")
+        return None
+    if not content:
+        return (None, None)
+
+    digest = hashlib.blake2b(content.encode('utf-8', errors='ignore'), digest_size=16).hexdigest()
+
+    if summarizer == "lsa" and not ensure_nltk_data(recheck=nltk_ready):
+        if nltk_ready:
+            return None # Worker can't see the data the caller found: don't cache a stand-in
+        # No tokenizer data (yet): the head of the text is better than nothing
+        return (digest, summarize_head(content))
+
+    try:
+        # Summarize
+        return (digest, SUMMARIZERS.get(summarizer, summarize_lsa)(content) or None)
+    except ImportError:
+        return None # Summarizer backend missing: try again next time
+    except Exception:
+        return (digest, None) # Skip content if summarization fails
+
+def file_hash(file_path, chunk_size=1024 * 1024):
+    """Streams a file through blake2b and returns the hex digest"""
+    h = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+def partial_hash(file_path, size=64 * 1024):
+    """blake2b of the first `size` bytes; a cheap pre-filter before hashing whole files"""
+    with open(file_path, 'rb') as f:
+        return hashlib.blake2b(f.read(size), digest_size=16).hexdigest()
+
+def _group_by_key(entries, key_func):
+    """Groups entries by key_func(entry); entries that can't be read are dropped"""
+    groups = {}
+    for e in entries:
+        try:
+            key = key_func(e)
+        except OSError:
+            continue
+        groups.setdefault(key, []).append(e)
+    return [group for group in groups.values() if len(group) > 1]
+
+def find_duplicate_groups(entries, partial_size=64 * 1024):
+    """
+    Finds byte-identical files among FileEntry records (stat'ed, so size is known).
+    Narrows by size, then by a partial hash, then by a full streamed hash,
+    so only real candidates are ever read in full.
+    Each group lists the shortest name first (usually the original, not "name (1).ext"),
+    which serves as the group's representative.
+    """
+    by_size = _group_by_key([e for e in entries if e.size], lambda e: e.size)
+
+    groups = []
+    for same_size in by_size:
+        for candidates in _group_by_key(same_size, lambda e: partial_hash(e.path, partial_size)):
+            if candidates[0].size <= partial_size:
+                # The partial hash already covered the whole file
+                groups.append(candidates)
+            else:
+                groups.extend(_group_by_key(candidates, lambda e: file_hash(e.path)))
+
+    groups = [sorted(group, key=lambda e: (len(e.name), e.name)) for group in groups]
+    return sorted(groups, key=lambda group: group[0].name)
+
+def fan_out_duplicates(suggestions, duplicates):
+    """Copies each representative's suggestion to its identical files (listed right after it)"""
+    results = []
+    for suggestion in suggestions:
+        results.append(suggestion)
+        for name in duplicates.get(suggestion.get("file"), []):
+            copy = dict(suggestion)
+            copy["file"] = name
+            copy["reason"] = f"Duplicate of {suggestion.get('file')}"
+            results.append(copy)
+    return results
+
+CONTENT_CACHE_VERSION = 3
+
+class ContentCache:
+    """
+    On-disk (SQLite) cache of content-mode results.
+    Keyed by absolute path and only valid while size and mtime_ns (and the content
+    hash, when one is given) still match. Evicts least recently used rows once
+    the stored bytes exceed max_bytes.
+    """
+    def __init__(self, db_path, max_bytes=50 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        # Bumped when analyze_file's results change meaning
+        # (v2: long files get a summary of their head, v3: summaries are per summarizer tier)
+        if self._conn.execute("PRAGMA user_version").fetchone()[0] < CONTENT_CACHE_VERSION:
+            self._conn.execute("DROP TABLE IF EXISTS content_cache")
+            self._conn.execute(f"PRAGMA user_version = {CONTENT_CACHE_VERSION}")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS content_cache (
+                path TEXT PRIMARY KEY,
+                size INTEGER,
+                mtime_ns INTEGER,
+                content_hash TEXT,
+                digest TEXT,
+                summary TEXT,
+                summarizer TEXT,
+                bytes INTEGER,
+                last_used REAL
+            )
+        """)
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_content_cache_lru ON content_cache(last_used)")
+        self._conn.commit()
+
+    def get(self, path, size, mtime_ns, content_hash=None, summarizer=DEFAULT_SUMMARIZER):
+        """Returns {"digest", "summary"} for a fresh entry made by the same summarizer, or None on a miss"""
+        path = os.path.abspath(path)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, content_hash, digest, summary, summarizer FROM content_cache WHERE path = ?",
+                (path,)
+            ).fetchone()
+
+            if (row is None or row[0] != size or row[1] != mtime_ns or row[5] != summarizer
+                    or (content_hash and row[2] and row[2] != content_hash)):
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._conn.execute("UPDATE content_cache SET last_used = ? WHERE path = ?", (time.time(), path))
+            self._conn.commit()
+            return {"digest": row[3], "summary": row[4]}
+
+    def put_many(self, items):
+        """items: iterable of (path, size, mtime_ns, content_hash, digest, summary, summarizer)"""
+        now = time.time()
+        rows = []
+        for path, size, mtime_ns, content_hash, digest, summary, summarizer in items:
+            path = os.path.abspath(path)
+            nbytes = len(path) + len(digest or '') + len((summary or '').encode('utf-8'))
+            rows.append((path, size, mtime_ns, content_hash, digest, summary, summarizer, nbytes, now))
+
+        if not rows:
+            return
+
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO content_cache VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows
+            )
+            self._evict()
+            self._conn.commit()
+
+    def _evict(self):
+        total = self._conn.execute("SELECT COALESCE(SUM(bytes), 0) FROM content_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        # Drop oldest rows until we are back under the cap
+        excess = total - self.max_bytes
+        doomed = []
+        for path, nbytes in self._conn.execute("SELECT path, bytes FROM content_cache ORDER BY last_used ASC"):
+            doomed.append((path,))
+            excess -= nbytes
+            if excess <= 0:
+                break
+        self._conn.executemany("DELETE FROM content_cache WHERE path = ?", doomed)
+
+    def stats(self):
+        with self._lock:
+            entries, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(bytes), 0) FROM content_cache"
+            ).fetchone()
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes
+        }
+
+    def clear(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM content_cache")
+            self._conn.commit()
+            self.hits = 0
+            self.misses = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class ConfigStore:
+    """
+    In-memory cache of the JSON files under ~/.system_cleaner.
+    A read only stats the file and re-parses it when (mtime_ns, size) changed,
+    so edits made outside the app are still picked up. Writes go through a temp
+    file + os.replace so a crash never leaves half a file behind. write_later
+    coalesces bursts of writes (e.g. several settings changed in a row) into one
+    disk write after `delay` seconds; reads see the new value immediately.
+    Returned objects are shared with the cache, so callers must not mutate them.
+    """
+    def __init__(self, delay=0.25):
+        self.delay = delay
+        self.reads = 0
+        self.loads = 0
+        self.writes = 0
+        self._lock = threading.RLock()
+        self._cache = {} # path -> (stamp, data)
+        self._dirty = {} # path -> data waiting for write_later's flush
+        self._timer = None
+
+    def _stamp(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size)
+
+    def read(self, path, default=None):
+        with self._lock:
+            self.reads += 1
+            if path in self._dirty:
+                return self._dirty[path]
+
+            stamp = self._stamp(path)
+            if stamp is None:
+                self._cache.pop(path, None)
+                return default
+
+            cached = self._cache.get(path)
+            if cached is not None and cached[0] == stamp:
+                return cached[1]
+
+            try:
+                with open(path, 'r') as f:
+                    data = json.load(f)
+            except Exception:
+                return default
+            self.loads += 1
+            self._cache[path] = (stamp, data)
+            return data
+
+    def _write_file(self, path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(data, f)
+        os.replace(tmp_path, path)
+        self.writes += 1
+        self._cache[path] = (self._stamp(path), data)
+
+    def write(self, path, data):
+        """Writes now (atomically); drops any pending write_later for the same file"""
+        with self._lock:
+            self._dirty.pop(path, None)
+            self._write_file(path, data)
+
+    def write_later(self, path, data):
+        with self._lock:
+            self._dirty[path] = data
+            if self._timer is None:
+                self._timer = threading.Timer(self.delay, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def update(self, path, changes):
+        """Merges changes into a JSON object file (settings.json) with a coalesced write"""
+        with self._lock:
+            data = dict(self.read(path, {}) or {})
+            data.update(changes)
+            self.write_later(path, data)
+            return data
+
+    def forget(self, path):
+        """Drops a file from the cache (it was renamed or deleted)"""
+        with self._lock:
+            self._dirty.pop(path, None)
+            self._cache.pop(path, None)
+
+    def flush(self):
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            dirty, self._dirty = self._dirty, {}
+            for path, data in dirty.items():
+                try:
+                    self._write_file(path, data)
+                except Exception as e:
+                    print(f"Error saving {path}: {e}")
+
+    def stats(self):
+        return {"reads": self.reads, "loads": self.loads, "writes": self.writes, "pending": len(self._dirty)}
+
+class HistoryStore:
+    """
+    Undo history in SQLite. Sessions hold the summary shown in the history list
+    (so listing never reads moves); moves are keyed by (session_id, seq) and
+    are read back in pages when a session is restored.
+    """
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS sessions (
+                id INTEGER PRIMARY KEY,
+                date TEXT,
+                path TEXT,
+                count INTEGER
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS moves (
+                session_id INTEGER,
+                seq INTEGER,
+                original_path TEXT,
+                new_path TEXT,
+                PRIMARY KEY (session_id, seq)
+            ) WITHOUT ROWID
+        """)
+        # One-time imports that already happened (see migrate_json)
+        self._conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)")
+        self._conn.commit()
+
+    def add_session(self, date, path, moves, session_id=None):
+        """
+        Appends a session; moves is an iterable of {"original_path", "new_path"}.
+        A move may carry "seq" (the order it was requested in, e.g. from a journal
+        written in completion order); otherwise its position is used.
+        Ids default to the current unix time, bumped past the newest id if two
+        runs land in the same second. Returns the id used.
+        """
+        with self._lock:
+            if session_id is None:
+                last_id = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM sessions").fetchone()[0]
+                session_id = max(int(time.time()), last_id + 1)
+            self._insert_session(date, path, moves, session_id)
+            self._conn.commit()
+            return session_id
+
+    def _insert_session(self, date, path, moves, session_id):
+        """Inserts a session and its moves without committing (caller holds the lock)"""
+        count = 0
+        def rows():
+            nonlocal count
+            for index, move in enumerate(moves):
+                count += 1
+                yield (session_id, move.get("seq", index), move["original_path"], move["new_path"])
+
+        self._conn.execute("INSERT INTO sessions VALUES (?, ?, ?, 0)", (session_id, date, path))
+        self._conn.executemany("INSERT INTO moves VALUES (?, ?, ?, ?)", rows())
+        self._conn.execute("UPDATE sessions SET count = ? WHERE id = ?", (count, session_id))
+
+    def list_sessions(self):
+        """Session summaries, newest first"""
+        with self._lock:
+            rows = self._conn.execute("SELECT id, date, path, count FROM sessions ORDER BY id DESC").fetchall()
+        return [{"id": r[0], "date": r[1], "path": r[2], "count": r[3]} for r in rows]
+
+    def get_session(self, session_id):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT id, date, path, count FROM sessions WHERE id = ?", (session_id,)
+            ).fetchone()
+        if row is None:
+            return None
+        return {"id": row[0], "date": row[1], "path": row[2], "count": row[3]}
+
+    def iter_moves(self, session_id, reverse=False, page_size=1000):
+        """Yields a session's moves a page at a time (newest first with reverse=True)"""
+        if reverse:
+            query = ("SELECT seq, original_path, new_path FROM moves "
+                     "WHERE session_id = ? AND seq < ? ORDER BY seq DESC LIMIT ?")
+            cursor = float('inf')
+        else:
+            query = ("SELECT seq, original_path, new_path FROM moves "
+                     "WHERE session_id = ? AND seq > ? ORDER BY seq ASC LIMIT ?")
+            cursor = -1
+
+        while True:
+            with self._lock:
+                rows = self._conn.execute(query, (session_id, cursor, page_size)).fetchall()
+            if not rows:
+                return
+            for seq, original_path, new_path in rows:
+                yield {"original_path": original_path, "new_path": new_path}
+            cursor = rows[-1][0]
+
+    def delete_session(self, session_id):
+        with self._lock:
+            self._conn.execute("DELETE FROM moves WHERE session_id = ?", (session_id,))
+            self._conn.execute("DELETE FROM sessions WHERE id = ?", (session_id,))
+            self._conn.commit()
+
+    def migrate_json(self, json_path):
+        """
+        One-time import of the old history.json. The file is renamed to
+        history.json.migrated afterwards so it is kept but never read again.
+        Old ids are unix seconds and can repeat: a taken id moves up to the
+        next free one. All sessions go in as one transaction, recorded in the
+        migrations table, so a failure leaves nothing behind (and raises, to
+        be retried) and a crash before the rename can't import them twice.
+        """
+        if not os.path.exists(json_path):
+            return 0
+        try:
+            with open(json_path, 'r') as f:
+                history = json.load(f)
+        except Exception as e:
+            print(f"Could not migrate {json_path}: {e}")
+            return 0
+
+        name = os.path.basename(json_path)
+        migrated = 0
+        with self._lock:
+            if self._conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone() is None:
+                try:
+                    for session in history:
+                        session_id = int(session["id"])
+                        while self._conn.execute("SELECT 1 FROM sessions WHERE id = ?", (session_id,)).fetchone():
+                            session_id += 1
+                        self._insert_session(session["date"], session["path"], session["moves"], session_id)
+                        migrated += 1
+                    self._conn.execute("INSERT INTO migrations VALUES (?)", (name,))
+                    self._conn.commit()
+                except Exception:
+                    self._conn.rollback()
+                    raise
+
+        os.replace(json_path, json_path + ".migrated")
+        return migrated
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class FolderSnapshot:
+    """
+    What an organize run saw in a target folder: (inode, size, mtime_ns, decision)
+    per file it left in place, keyed by path relative to the folder. Only valid
+    for the rules/filter signature it was taken with. Decisions depend on the
+    name alone, so a file is re-evaluated only when its inode changes (it was
+    replaced); the inode comes with the listing, so unchanged files cost no stat.
+    dir_mtime_ns is the folder's own mtime when the run started (None if the run
+    was stopped); if the folder hasn't changed since, nothing can have arrived.
+    """
+    def __init__(self, signature, taken_at_ns, dir_mtime_ns, entries):
+        self.signature = signature
+        self.taken_at_ns = taken_at_ns
+        self.dir_mtime_ns = dir_mtime_ns
+        self.entries = entries
+
+    def unchanged(self, dir_mtime_ns, slack_ns=2 * 10**9):
+        """
+        True when the folder's mtime still matches. Only trusted when that mtime
+        is comfortably older than the snapshot, since coarse filesystem clocks
+        can hide a file that landed in the same tick.
+        """
+        return (self.dir_mtime_ns is not None and self.dir_mtime_ns == dir_mtime_ns
+                and dir_mtime_ns < self.taken_at_ns - slack_ns)
+
+class SnapshotStore:
+    """
+    SQLite store of FolderSnapshot per target path, used by incremental organize.
+    save() only writes the rows that differ from the previous snapshot, so a
+    run costs time proportional to what changed in the folder.
+    """
+    def __init__(self, db_path):
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshots (
+                target TEXT PRIMARY KEY,
+                signature TEXT,
+                taken_at_ns INTEGER,
+                dir_mtime_ns INTEGER
+            )
+        """)
+        self._conn.execute("""
+            CREATE TABLE IF NOT EXISTS snapshot_entries (
+                target TEXT,
+                name TEXT,
+                inode INTEGER,
+                size INTEGER,
+                mtime_ns INTEGER,
+                decision TEXT,
+                PRIMARY KEY (target, name)
+            ) WITHOUT ROWID
+        """)
+        self._conn.commit()
+
+    def load(self, target, signature=None):
+        """Returns the FolderSnapshot for target, or None if missing or taken with other rules"""
+        target = os.path.abspath(target)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT signature, taken_at_ns, dir_mtime_ns FROM snapshots WHERE target = ?", (target,)
+            ).fetchone()
+            if row is None:
+                return None
+            if signature is not None and row[0] != signature:
+                return None
+            entries = {
+                row[0]: row[1:]
+                for row in self._conn.execute(
+                    "SELECT name, inode, size, mtime_ns, decision FROM snapshot_entries WHERE target = ?", (target,)
+                )
+            }
+        return FolderSnapshot(row[0], row[1], row[2], entries)
+
+    def save(self, target, snapshot, previous=None):
+        """Stores snapshot, writing only the entries that changed since previous"""
+        target = os.path.abspath(target)
+        old = previous.entries if previous is not None and previous.signature == snapshot.signature else None
+        with self._lock:
+            if old is None:
+                self._conn.execute("DELETE FROM snapshot_entries WHERE target = ?", (target,))
+                old = {}
+            removed = [(target, name) for name in old if name not in snapshot.entries]
+            changed = [
+                (target, name) + tuple(state)
+                for name, state in snapshot.entries.items()
+                if old.get(name) != tuple(state)
+            ]
+            self._conn.executemany("DELETE FROM snapshot_entries WHERE target = ? AND name = ?", removed)
+            self._conn.executemany("INSERT OR REPLACE INTO snapshot_entries VALUES (?, ?, ?, ?, ?, ?)", changed)
+            self._conn.execute(
+                "INSERT OR REPLACE INTO snapshots VALUES (?, ?, ?, ?)",
+                (target, snapshot.signature, snapshot.taken_at_ns, snapshot.dir_mtime_ns)
+            )
+            self._conn.commit()
+        return len(changed) + len(removed)
+
+    def clear(self, target=None):
+        with self._lock:
+            if target is None:
+                self._conn.execute("DELETE FROM snapshot_entries")
+                self._conn.execute("DELETE FROM snapshots")
+            else:
+                target = os.path.abspath(target)
+                self._conn.execute("DELETE FROM snapshot_entries WHERE target = ?", (target,))
+                self._conn.execute("DELETE FROM snapshots WHERE target = ?", (target,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+class MoveJournal:
+    """
+    Write-ahead journal for one organize/apply run, so a crash or kill midway
+    still leaves a record of the moves already made.
+    Each move is written to the OS as soon as it lands (survives the process
+    dying); fsync happens every sync_every moves or sync_interval seconds,
+    whichever comes first (sync_every=1 syncs every move). The journal is
+    deleted once its session is in the history store; leftovers are turned
+    into sessions by recover_journals on the next start.
+    The journal stays locked while the run is going, so another instance
+    (e.g. the GUI next to a headless --watch) leaves it alone.
+    """
+    def __init__(self, journal_dir, date, path, sync_every=256, sync_interval=1.0):
+        if not os.path.exists(journal_dir):
+            os.makedirs(journal_dir)
+        self.path = os.path.join(journal_dir, f"{time.time_ns()}.jsonl")
+        self.sync_every = max(1, int(sync_every))
+        self.sync_interval = sync_interval
+        self._lock = threading.Lock()
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        self._file = open(self.path, 'a', encoding='utf-8')
+        self._holder = open(self.path, 'rb')
+        _try_lock(self._holder)
+        self._file.write(json.dumps({"date": date, "path": path}) + "\n")
+        self._sync()
+
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    def record(self, original_path, new_path, seq=None):
+        """
+        Thread-safe; called from the mover threads after each successful move.
+        seq is the move's place in the run, so history keeps the requested order.
+        """
+        move = {"original_path": original_path, "new_path": new_path}
+        if seq is not None:
+            move["seq"] = seq
+        line = json.dumps(move) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._unsynced += 1
+            if self._unsynced >= self.sync_every or time.monotonic() - self._last_sync >= self.sync_interval:
+                self._sync()
+
+    def moves(self):
+        """Syncs and then streams back the moves recorded so far, in completion order"""
+        with self._lock:
+            self._sync()
+        header_seen = False
+        for record in iter_journal(self.path):
+            if header_seen:
+                yield record
+            header_seen = True
+
+    def discard(self):
+        """Run finished and its session was saved: the journal is no longer needed"""
+        with self._lock:
+            self._file.close()
+        _remove_locked(self.path, self._holder)
+
+def _try_lock(f):
+    """
+    Non-blocking exclusive lock on an open file. The OS drops it when the file
+    is closed or the process dies, so a crashed run never leaves it behind.
+    """
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            # Windows locks block reads too: lock a byte far past the data instead
+            f.seek(1 << 40)
+            msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return True
+    except OSError:
+        return False
+
+def _remove_locked(path, holder):
+    """Deletes a file while still holding its lock where the OS allows it (not on Windows)"""
+    try:
+        os.remove(path)
+        holder.close()
+    except PermissionError:
+        holder.close()
+        os.remove(path)
+
+def iter_journal(journal_path):
+    """Yields the records of a journal file (header first), stopping at a torn last line"""
+    with open(journal_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                return # Partial write from the crash
+            yield record
+
+def read_journal(journal_path):
+    """Returns (header, moves) from a journal file"""
+    records = iter_journal(journal_path)
+    header = next(records, None)
+    return header, list(records)
+
+def recover_journals(journal_dir, history_store):
+    """
+    Turns journals left behind by a crashed run into restorable history sessions.
+    Journals another running instance still holds locked are skipped.
+    """
+    if not os.path.isdir(journal_dir):
+        return 0
+
+    recovered = 0
+    for name in sorted(os.listdir(journal_dir)):
+        if not name.endswith(".jsonl"):
+            continue
+        journal_path = os.path.join(journal_dir, name)
+        try:
+            holder = open(journal_path, 'rb')
+        except OSError:
+            continue # Finished and removed meanwhile
+        try:
+            if not _try_lock(holder):
+                holder.close()
+                continue # Live run in another instance
+            header, moves = read_journal(journal_path)
+            if header is None and time.time() - os.path.getmtime(journal_path) < 60:
+                # Just created, its owner hasn't locked it yet
+                holder.close()
+                continue
+            if header and moves:
+                history_store.add_session(header["date"] + " (recovered)", header["path"], moves)
+                recovered += 1
+            _remove_locked(journal_path, holder)
+        except Exception as e:
+            holder.close()
+            print(f"Could not recover journal {journal_path}: {e}")
+    return recovered
+
+class ExtractionPool:
+    """
+    Bounded process pool for content-mode extraction.
+    Results come back in submission order. Only as many jobs as there are
+    workers are handed to the pool at a time, so each job's timeout runs from
+    when it actually starts. A job that overruns yields None, the pool is
+    killed and replaced right away, and the jobs that were running next to it
+    are started again on the new pool.
+    """
+    def __init__(self, workers=None, timeout=30, ocr_cache_path=None):
+        self.workers = workers or min(4, os.cpu_count() or 1)
+        self.timeout = timeout
+        # Tesseract has to give up before the pool does, or killing the worker orphans it
+        self.ocr_settings = (ocr_cache_path, max(1, min(OCR_TIMEOUT, timeout * 0.8)))
+        self._pool = None
+        self._lock = threading.Lock()
+
+    def _get_pool(self):
+        if self._pool is None:
+            self._pool = multiprocessing.Pool(self.workers, initializer=configure_ocr, initargs=self.ocr_settings)
+        return self._pool
+
+    def map(self, jobs):
+        """
+        jobs: list of (file_path, size[, summarizer[, nltk_ready]]) tuples.
+        Returns a list of analyze_file results, or None for files that failed or timed out.
+        """
+        if not jobs:
+            return []
+
+        # Single worker: run inline, no process overhead
+        if self.workers <= 1:
+            configure_ocr(*self.ocr_settings)
+            return [analyze_file(*job) for job in jobs]
+
+        with self._lock:
+            results = [None] * len(jobs)
+            waiting = deque(range(len(jobs)))
+            running = {} # job index -> (AsyncResult, deadline)
+            changed = threading.Event()
+            wake = lambda _: changed.set()
+
+            while waiting or running:
+                pool = self._get_pool()
+                while waiting and len(running) < self.workers:
+                    i = waiting.popleft()
+                    async_result = pool.apply_async(analyze_file, jobs[i], callback=wake, error_callback=wake)
+                    running[i] = (async_result, time.monotonic() + self.timeout)
+
+                changed.wait(max(0, min(deadline for _, deadline in running.values()) - time.monotonic()))
+                changed.clear()
+
+                now = time.monotonic()
+                stuck = False
+                for i, (async_result, deadline) in list(running.items()):
+                    if async_result.ready():
+                        del running[i]
+                        try:
+                            results[i] = async_result.get(0)
+                        except Exception:
+                            pass # Failed: stays None
+                    elif now >= deadline:
+                        del running[i]
+                        stuck = True
+
+                if stuck:
+                    # Kill the hung worker (e.g. runaway OCR) now; jobs caught up in it start over
+                    pool.terminate()
+                    self._pool = None
+                    waiting.extendleft(sorted(running, reverse=True))
+                    running.clear()
+
+            return results
+
+    def close(self):
+        with self._lock:
+            if self._pool is not None:
+                self._pool.terminate()
+                self._pool = None
+
+AI_SYSTEM_PROMPT = "You are a helpful file organization assistant that outputs JSON only."
+
+def build_ai_prompt(instructions, prioritize_rules, rules, files_to_analyze):
+    prompt = f"""
+    You are a smart file organizer.
     
-    web_dir = os.path.join(base_path, 'web')
-    index_path = os.path.join(web_dir, 'index.html')
+    User Instructions: {instructions if instructions else "Sort these files into logical folders based on name and content."}
+    
+    {f"1. STRICTLY Follow the User's Rules below if they match. A file's 'rule_folder' is the folder its matching rule points to." if prioritize_rules else "1. IGNORE the User's Rules if they are too generic. Prioritize creating specific subfolders based on the file's unique context."}
+    2. Follow the User's Custom Instructions below.
+    3. Analyze the **FULL filename** for context (keywords, dates, project names), NOT just the extension.
+    4. **OUTPUT FORMAT**: Return a **SINGLE LINE** of valid JSON. **NO NEWLINES**. **NO INDENTATION**.
+    
+    IMPORTANT PRIORITIES:
+    - Group related files (e.g. "Invoice_Jan.pdf", "Invoice_Feb.pdf" -> "Invoices")
+    - Create generic folders ONLY if no specific context exists (e.g. "Documents", "Images")
+    - If a file is "unknown" or "trash", suggest a "Misc" or "Review" folder.
+    
+    Return ONLY a JSON object with this structure:
+    {{"suggestions":[{{"file":"filename.ext","folder":"SuggestedFolder","reason":"Short reason (max 5 words)"}}]}}
+    
+    User's Rules:
+    {json.dumps(rules) if prioritize_rules else "[]"}
+
+    Files to Analyze:
+    {json.dumps(files_to_analyze)}
+    """
+    return prompt
+
+def parse_ai_response(content):
+    """
+    Parses the model output into a list of suggestions.
+    Raises ValueError if nothing usable can be recovered.
+    """
+    # Extract JSON if wrapped in markdown
+    if "```json" in content:
+        content = content.split("```json")[1].split("```")[0].strip()
+    elif "```" in content:
+        content = content.split("```")[1].split("```")[0].strip()
+        
+    # Handle strict=False for potential control characters
+    try:
+        parsed = json.loads(content, strict=False)
+    except json.JSONDecodeError:
+        # Fallback: Aggressive Repair
+        try:
+            # 1. Clean up whitespace/markdown
+            content = content.strip()
+            if content.startswith("```json"): content = content[7:]
+            if content.startswith("```"): content = content[3:]
+            if content.endswith("```"): content = content[:-3]
+            content = content.strip()
+            
+            # 2. Try to find the array start
+            start_idx = content.find('[')
+            if start_idx == -1: raise Exception("No array found")
+            
+            # 3. Find the last closing brace '}' to cut off incomplete objects
+            last_brace_idx = content.rfind('}')
+            if last_brace_idx == -1: raise Exception("No objects found")
+            
+            # Keep only up to the last valid object
+            valid_content = content[start_idx:last_brace_idx+1]
+            
+            # Close the array and object
+            fixed_json = f'{{"suggestions": {valid_content}]}}'
+            
+            parsed = json.loads(fixed_json, strict=False)
+        except:
+             # 3. Nuclear Option: Regex extract specific fields
+             try:
+                 suggestions = []
+                 matches = re.findall(r'"file"\s*:\s*"(.*?)",\s*"folder"\s*:\s*"(.*?)",\s*"reason"\s*:\s*"(.*?)"', content)
+                 for m in matches:
+                     suggestions.append({
+                         "file": m[0],
+                         "folder": m[1],
+                         "reason": m[2]
+                     })
+                 
+                 if not suggestions: raise Exception("Regex failed")
+                 parsed = {"suggestions": suggestions}
+             except:
+                 raise ValueError(f"AI Response Invalid/Truncated. Raw: {content[:100]}...")
+
+    return parsed.get("suggestions", [])
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` requests per second, bursting up to `capacity`"""
+    def __init__(self, rate, capacity=1):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+def is_retryable_error(error):
+    """Rate limits (429), server errors (5xx) and connection problems are worth retrying"""
+    status = getattr(error, 'status_code', None)
+    if status is not None:
+        return status == 429 or status >= 500
+    return type(error).__name__ in ('APIConnectionError', 'APITimeoutError')
+
+def retry_delay(error, attempt, base=1.0, cap=30.0):
+    """Honors Retry-After when the server sends one, else exponential backoff with jitter"""
+    response = getattr(error, 'response', None)
+    if response is not None:
+        try:
+            return min(cap, float(response.headers.get('retry-after')))
+        except (TypeError, ValueError):
+            pass
+    return min(cap, base * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+def request_suggestions(client, model_name, prompt, limiter=None, max_retries=0, on_suggestion=None):
+    """
+    One chat completion for one batch, with rate limiting and retry on transient errors.
+    With on_suggestion the completion is streamed and each suggestion is handed
+    over as soon as its JSON object is complete.
+    Returns (suggestions, finish_reason); finish_reason "length" means the output was cut off.
+    """
+    attempt = 0
+    while True:
+        if limiter:
+            limiter.acquire()
+        parser = SuggestionStreamParser()
+        raw = []
+        finish_reason = None
+        try:
+            response = client.chat.completions.create(
+                model=model_name,
+                messages=[
+                    {"role": "system", "content": AI_SYSTEM_PROMPT},
+                    {"role": "user", "content": prompt}
+                ],
+                temperature=0.1,
+                stream=on_suggestion is not None
+            )
+            if on_suggestion is None:
+                choice = response.choices[0]
+                return parse_ai_response(choice.message.content), choice.finish_reason
+
+            for chunk in response:
+                if not chunk.choices:
+                    continue
+                if chunk.choices[0].finish_reason:
+                    finish_reason = chunk.choices[0].finish_reason
+                text = chunk.choices[0].delta.content
+                if not text:
+                    continue
+                raw.append(text)
+                for suggestion in parser.feed(text):
+                    on_suggestion(suggestion)
+        except Exception as e:
+            if parser.suggestions:
+                # Stream broke midway: keep what was already delivered
+                return parser.suggestions, "length"
+            if attempt >= max_retries or not is_retryable_error(e):
+                raise
+            time.sleep(retry_delay(e, attempt))
+            attempt += 1
+            continue
+
+        if parser.suggestions:
+            return parser.suggestions, finish_reason
+
+        # Nothing recognizable while streaming: run the full repair path once
+        return parse_ai_response("".join(raw)), finish_reason
+
+def estimate_tokens(text):
+    """Rough token count (~4 chars per token for English/JSON), good enough for packing"""
+    return len(text) // 4 + 1
+
+class BatchPlanner:
+    """
+    Packs files into requests by estimated tokens instead of a fixed count.
+    Each file costs its JSON entry in the prompt plus the suggestion it produces.
+    The budget shrinks when a response comes back truncated and slowly grows
+    back toward the configured ceiling after clean responses.
+    """
+    MIN_BUDGET = 1000
+
+    def __init__(self, token_budget):
+        self.max_budget = token_budget
+        self.budget = token_budget
+        self._lock = threading.Lock()
+
+    def file_tokens(self, file_info):
+        # Prompt entry + expected {"file":..,"folder":..,"reason":..} output
+        return estimate_tokens(json.dumps(file_info)) + estimate_tokens(file_info["name"]) + 20
 
+    def plan(self, base_tokens, files_to_analyze):
+        """Splits files into batches whose estimated size fits the current budget"""
+        batches = []
+        batch = []
+        used = base_tokens
+        for file_info in files_to_analyze:
+            cost = self.file_tokens(file_info)
+            # Always take at least one file so oversized entries still go out
+            if batch and used + cost > self.budget:
+                batches.append(batch)
+                batch = []
+                used = base_tokens
+            batch.append(file_info)
+            used += cost
+        if batch:
+            batches.append(batch)
+        return batches
+
+    def record(self, truncated):
+        with self._lock:
+            if truncated:
+                self.budget = max(self.MIN_BUDGET, int(self.budget * 0.7))
+            else:
+                self.budget = min(self.max_budget, int(self.budget * 1.1))
+
+class ClientManager:
+    """
+    Keeps one OpenAI client per (base_url, api_key) and one requests.Session,
+    so HTTP keep-alive connections survive across pages and scans.
+    The stats count client/session objects handed out, not pooled HTTP
+    connections: the pools inside httpx/urllib3 aren't visible from here.
+    """
+    def __init__(self):
+        self._clients = {}
+        self._session = None
+        self._lock = threading.Lock()
+        self.stats = {
+            "openai_client_objects_created": 0,
+            "openai_client_objects_reused": 0,
+            "http_session_objects_created": 0,
+            "http_session_lookups": 0
+        }
+
+    def get_openai(self, api_key, base_url):
+        key = (base_url, api_key)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                from openai import OpenAI
+                client = OpenAI(api_key=api_key, base_url=base_url)
+                self._clients[key] = client
+                self.stats["openai_client_objects_created"] += 1
+            else:
+                self.stats["openai_client_objects_reused"] += 1
+            return client
+
+    def get_session(self):
+        with self._lock:
+            if self._session is None:
+                import requests
+                self._session = requests.Session()
+                self.stats["http_session_objects_created"] += 1
+            self.stats["http_session_lookups"] += 1
+            return self._session
+
+    def get_stats(self):
+        with self._lock:
+            stats = dict(self.stats)
+            stats["open_clients"] = len(self._clients)
+            return stats
+
+    def close(self):
+        with self._lock:
+            for client in self._clients.values():
+                try:
+                    client.close()
+                except Exception:
+                    pass
+            self._clients = {}
+            if self._session is not None:
+                self._session.close()
+                self._session = None
+
+class SuggestionStreamParser:
+    """
+    Incremental parser for {"suggestions":[{...}, ...]} arriving in chunks.
+    feed() returns the suggestion objects completed by that chunk, so a
+    truncated response only loses its last, partial object.
+    """
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0            # next char to scan
+        self.in_array = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.obj_start = None
+        self.suggestions = []
+
+    def feed(self, chunk):
+        self.buffer += chunk
+        completed = []
+
+        if not self.in_array:
+            key = self.buffer.find('"suggestions"')
+            if key == -1:
+                return completed
+            bracket = self.buffer.find('[', key)
+            if bracket == -1:
+                return completed
+            self.in_array = True
+            self.pos = bracket + 1
+
+        buf = self.buffer
+        i = self.pos
+        while i < len(buf):
+            ch = buf[i]
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == '\\':
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch == '{':
+                if self.depth == 0:
+                    self.obj_start = i
+                self.depth += 1
+            elif ch == '}' and self.depth > 0:
+                self.depth -= 1
+                if self.depth == 0:
+                    try:
+                        obj = json.loads(buf[self.obj_start:i + 1], strict=False)
+                        if isinstance(obj, dict):
+                            completed.append(obj)
+                    except json.JSONDecodeError:
+                        pass
+                    self.obj_start = None
+            i += 1
+        self.pos = i
+
+        # Drop fully consumed text so the buffer stays small
+        keep_from = self.obj_start if self.obj_start is not None else self.pos
+        self.buffer = buf[keep_from:]
+        self.pos -= keep_from
+        if self.obj_start is not None:
+            self.obj_start = 0
+
+        self.suggestions.extend(completed)
+        return completed
+
+class UIEventBus:
+    """
+    Queues log/progress events from a worker thread and forwards them to the
+    webview in one evaluate_js call per interval (instead of one or two per file).
+    Progress is coalesced to the latest value.
+    """
+    def __init__(self, interval=0.08):
+        self.interval = interval
+        self._logs = []
+        self._progress = None
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        return self
+
+    def log(self, entry):
+        with self._lock:
+            self._logs.append(entry)
+
+    def progress(self, percent):
+        with self._lock:
+            self._progress = percent
+
+    def flush(self):
+        with self._lock:
+            logs, progress = self._logs, self._progress
+            self._logs = []
+            self._progress = None
+
+        if not logs and progress is None:
+            return
+        try:
+            webview.windows[0].evaluate_js(f'window.uiEvents({json.dumps({"logs": logs, "progress": progress})})')
+        except Exception as e:
+            print(f"UI update failed: {e}")
+
+    def finish(self, js=None):
+        """Stops the flush loop, delivers what is queued, then runs a final call (e.g. cleaningComplete)"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        if js:
+            webview.windows[0].evaluate_js(js)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.flush()
+
+# Default filesystems on Windows and macOS ignore case when matching names
+CASE_INSENSITIVE_FS = os.name == 'nt' or sys.platform == 'darwin'
+
+def _name_key(name):
+    return name.lower() if CASE_INSENSITIVE_FS else name
+
+class DirectoryNameIndex:
+    """
+    Names present in one target directory, listed once per run, so picking a free
+    name is a set lookup instead of an os.path.exists probe loop. Counters per
+    (base, extension) remember where the last _N search stopped; the results are the
+    same "first free name, name_1, name_2, ..." a fresh probe would give.
+    With probe_limit, the first that many claims probe the disk instead and the
+    directory is only listed once more files head there (a few new downloads
+    shouldn't list a folder of 500k files).
+    """
+    def __init__(self, path, probe_limit=0):
+        if not os.path.exists(path):
+            os.makedirs(path)
+        self.path = path
+        self.names = None
+        self.claimed = set() # Names handed out while still probing
+        self.probes_left = probe_limit
+        self.counters = {}
+
+    def _taken(self, name):
+        if self.names is not None:
+            return _name_key(name) in self.names
+        return _name_key(name) in self.claimed or os.path.lexists(os.path.join(self.path, name))
+
+    def _take(self, name):
+        (self.names if self.names is not None else self.claimed).add(_name_key(name))
+        return name
+
+    def allocate(self, filename):
+        """Returns a name not yet used in the directory and records it as taken"""
+        if self.names is None:
+            if self.probes_left > 0:
+                self.probes_left -= 1
+            else:
+                self.names = set(_name_key(n) for n in os.listdir(self.path)) | self.claimed
+
+        if not self._taken(filename):
+            return self._take(filename)
+
+        # Handle duplicates
+        base, extension = os.path.splitext(filename)
+        counter_key = (_name_key(base), _name_key(extension))
+        counter = self.counters.get(counter_key, 1)
+        while self._taken(f"{base}_{counter}{extension}"):
+            counter += 1
+
+        self.counters[counter_key] = counter + 1
+        return self._take(f"{base}_{counter}{extension}")
+
+class MoveExecutor:
+    """
+    Moves files on a thread pool so slow moves (network shares, cross-device
+    copy+delete) overlap. The free name in the target directory is picked in
+    submit, on the caller's thread and in submission order (through the
+    directory's DirectoryNameIndex), so collision names are the same as in a
+    one-by-one run; only the move itself runs on the pool. probe_limit is
+    passed on to each DirectoryNameIndex.
+    """
+    def __init__(self, workers=8, should_stop=None, max_pending=4096, probe_limit=0):
+        self._pool = ThreadPoolExecutor(max_workers=workers)
+        # submit blocks once this many moves are queued, so a huge walk can't run ahead
+        self._slots = threading.BoundedSemaphore(max_pending)
+        self._guard = threading.Lock()
+        self._dir_locks = {}
+        self._indexes = {}
+        self._keys = {}
+        self.should_stop = should_stop or (lambda: False)
+        self.probe_limit = probe_limit
+
+    def _dir_key(self, target_dir):
+        # "Docs", "Docs/", "./Docs" (and "docs" where case is ignored) are one directory;
+        # realpath is a few syscalls, so it's resolved once per spelling
+        key = self._keys.get(target_dir)
+        if key is None:
+            key = self._keys[target_dir] = _name_key(os.path.normcase(os.path.realpath(target_dir)))
+        return key
+
+    def _dir_lock(self, key):
+        with self._guard:
+            lock = self._dir_locks.get(key)
+            if lock is None:
+                lock = self._dir_locks[key] = threading.Lock()
+            return lock
+
+    def _claim_name(self, target_dir, filename):
+        key = self._dir_key(target_dir)
+        with self._dir_lock(key):
+            index = self._indexes.get(key)
+            if index is None:
+                index = self._indexes[key] = DirectoryNameIndex(target_dir, self.probe_limit)
+            return index.allocate(filename)
+
+    def _move(self, src, dst):
+        if self.should_stop():
+            return None
+        if os.path.lexists(dst):
+            # Something else created it since the listing; never overwrite
+            raise FileExistsError(f"{dst} already exists")
+        shutil.move(src, dst)
+        return dst
+
+    def submit(self, src, target_dir, filename):
+        """Returns a future resolving to the final path, or None if stopped before moving"""
+        try:
+            dst = os.path.join(target_dir, self._claim_name(target_dir, filename))
+        except OSError as e:
+            # Destination can't be created/listed: fail this move like any other
+            future = Future()
+            future.set_exception(e)
+            return future
+        self._slots.acquire()
+        future = self._pool.submit(self._move, src, dst)
+        future.add_done_callback(lambda f: self._slots.release())
+        return future
+
+    def shutdown(self, cancel=False):
+        """Waits for running moves; with cancel=True queued ones are dropped"""
+        self._pool.shutdown(wait=True, cancel_futures=cancel)
+
+class InotifyWatch:
+    """
+    Minimal inotify binding (ctypes, Linux only) for one directory.
+    read(timeout) returns the names that were created, written or moved in,
+    or None when the kernel queue overflowed and events were lost.
+    """
+    IN_MODIFY = 0x00000002
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_Q_OVERFLOW = 0x00004000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    _EVENT = struct.Struct("iIII")
+
+    def __init__(self, path):
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        mask = self.IN_MODIFY | self.IN_CLOSE_WRITE | self.IN_MOVED_TO | self.IN_CREATE
+        if libc.inotify_add_watch(self._fd, os.fsencode(path), mask) < 0:
+            error = ctypes.get_errno()
+            os.close(self._fd)
+            raise OSError(error, f"inotify_add_watch failed for {path}")
+
+    def read(self, timeout):
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        names = []
+        offset = 0
+        while offset < len(data):
+            _, mask, _, length = self._EVENT.unpack_from(data, offset)
+            offset += self._EVENT.size
+            if mask & self.IN_Q_OVERFLOW:
+                return None
+            if length:
+                names.append(os.fsdecode(data[offset:offset + length].rstrip(b"\0")))
+            offset += length
+        return names
+
+    def close(self):
+        os.close(self._fd)
+
+class FolderWatcher:
+    """
+    Watches the top level of a folder for new files and hands them over in
+    batches once they stop changing.
+    Uses inotify on Linux and falls back to comparing directory listings every
+    poll_interval seconds elsewhere. A file is ready once its size and mtime
+    have held still for stable_seconds (so half-finished downloads wait).
+    Ready files are grouped for batch_window seconds (or max_batch files) and
+    passed to on_batch(names) on a separate worker thread.
+    Memory is bounded: at most max_pending files are tracked (beyond that the
+    watcher falls back to one listing of the folder) and at most max_queued
+    batches wait for the worker, after which the watcher simply waits.
+    """
+    def __init__(self, folder, on_batch, stable_seconds=2.0, batch_window=5.0, max_batch=500,
+                 poll_interval=2.0, max_pending=10000, max_queued=4, use_inotify=True):
+        self.folder = folder
+        self.on_batch = on_batch
+        self.stable_seconds = stable_seconds
+        self.batch_window = batch_window
+        self.max_batch = max_batch
+        self.poll_interval = poll_interval
+        self.max_pending = max_pending
+        self.backend = None
+        self._use_inotify = use_inotify
+        self._candidates = {} # name -> (size, mtime_ns, last change time)
+        self._batch = []
+        self._batch_started = None
+        self._rescan = False
+        self._batches = queue.Queue(maxsize=max_queued)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._stop.clear()
+        self._threads = [
+            threading.Thread(target=self._watch, daemon=True),
+            threading.Thread(target=self._work, daemon=True)
+        ]
+        for thread in self._threads:
+            thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+    @property
+    def running(self):
+        return any(thread.is_alive() for thread in self._threads)
+
+    def _listing(self):
+        try:
+            return {entry.name: (entry.size, entry.mtime) for entry in list_files(self.folder)}
+        except OSError:
+            return {}
+
+    def _add(self, names):
+        for name in names:
+            if name.startswith('.') or name in self._candidates:
+                continue
+            if len(self._candidates) >= self.max_pending:
+                self._rescan = True
+                return
+            self._candidates[name] = (None, None, time.monotonic())
+
+    def _check_candidates(self):
+        """Moves files whose size/mtime held still for stable_seconds into the current batch"""
+        now = time.monotonic()
+        for name, (size, mtime, since) in list(self._candidates.items()):
+            try:
+                st = os.stat(os.path.join(self.folder, name))
+            except OSError:
+                del self._candidates[name] # Gone (renamed .part file, already moved...)
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                del self._candidates[name] # Not a regular file (e.g. a folder we created)
+                continue
+            if (st.st_size, st.st_mtime_ns) != (size, mtime):
+                self._candidates[name] = (st.st_size, st.st_mtime_ns, now)
+            elif now - since >= self.stable_seconds:
+                del self._candidates[name]
+                if not self._batch:
+                    self._batch_started = now
+                self._batch.append(name)
+
+    def _flush_batch(self, force=False):
+        if not self._batch:
+            return
+        if force or len(self._batch) >= self.max_batch or time.monotonic() - self._batch_started >= self.batch_window:
+            batch, self._batch = self._batch, []
+            if force:
+                self._batches.put(batch)
+                return
+            while not self._stop.is_set():
+                try:
+                    self._batches.put(batch, timeout=0.5)
+                    return
+                except queue.Full:
+                    continue # Worker is behind: wait rather than queue without bound
+            self._batch = batch # Stopping: the final forced flush hands it over
+
+    def _watch(self):
+        inotify = None
+        if self._use_inotify and sys.platform.startswith("linux"):
+            try:
+                inotify = InotifyWatch(self.folder)
+            except (OSError, AttributeError) as e:
+                print(f"inotify unavailable, polling instead: {e}")
+        self.backend = "inotify" if inotify else "polling"
+        known = None if inotify else self._listing()
+        tick = min(0.5, self.stable_seconds / 2 or 0.5)
+
+        try:
+            while not self._stop.is_set():
+                if inotify:
+                    names = inotify.read(tick)
+                    if names is None:
+                        self._rescan = True # Kernel queue overflowed
+                    else:
+                        self._add(names)
+                else:
+                    self._stop.wait(self.poll_interval)
+                    current = self._listing()
+                    self._add(name for name, state in current.items() if known.get(name) != state)
+                    known = current
+
+                if self._rescan and len(self._candidates) < self.max_pending:
+                    # Lost track of individual events: look at everything once
+                    self._rescan = False
+                    self._add(self._listing())
+
+                self._check_candidates()
+                self._flush_batch()
+            self._flush_batch(force=True)
+        finally:
+            if inotify:
+                inotify.close()
+            self._batches.put(None)
+
+    def _work(self):
+        while True:
+            batch = self._batches.get()
+            if batch is None:
+                return
+            try:
+                self.on_batch(batch)
+            except Exception as e:
+                print(f"Watch batch failed: {e}")
+
+def create_api(config_dir=None):
+    """
+    Builds the Api object exposed to the web UI.
+    config_dir defaults to ~/.system_cleaner (benchmarks point it elsewhere).
+    """
     # Config for undo history
-    config_dir = os.path.join(os.path.expanduser("~"), ".system_cleaner")
+    if config_dir is None:
+        config_dir = os.path.join(os.path.expanduser("~"), ".system_cleaner")
     if not os.path.exists(config_dir):
         os.makedirs(config_dir)
-    history_file = os.path.join(config_dir, "history.json")
+    history_file = os.path.join(config_dir, "history.json") # Legacy, migrated into history.db
+    history_db_file = os.path.join(config_dir, "history.db")
+    journal_dir = os.path.join(config_dir, "journal")
     ignore_file = os.path.join(config_dir, "ignore_list.json")
     include_file = os.path.join(config_dir, "include_list.json")
     settings_file = os.path.join(config_dir, "settings.json")
@@ -65,12 +2275,36 @@ def create_app():
             pass
 
     ai_config_file = os.path.join(config_dir, "ai_config.json")
+    content_cache_file = os.path.join(config_dir, "content_cache.db")
+    ocr_cache_file = os.path.join(config_dir, "ocr_cache.db")
+    snapshot_file = os.path.join(config_dir, "snapshots.db")
 
     class Api:
         def __init__(self):
             self.stop_cleaning = False
             self.ai_results = []
+            self._compiled_rules = None
+            self._file_filter = None
+            self._extraction_pool = None
+            self._content_cache = None
+            self._clients = ClientManager()
+            self._batch_planner = None
+            self._duplicate_cache = None
+            self._history_store = None
+            self._history_migrated = False
+            self._snapshot_store = None
+            self._config = ConfigStore()
+            self._watcher = None
+            # Organize, AI apply, undo and watch batches move files one run at a time
+            self._move_lock = threading.Lock()
             
+        # --- Settings ---
+        def _get_settings(self):
+            return self._config.read(settings_file, {}) or {}
+
+        def _update_settings(self, **changes):
+            self._config.update(settings_file, changes)
+
         # --- Profiles Management ---
         def get_profiles(self):
             profiles = []
@@ -85,30 +2319,14 @@ def create_app():
             return sorted(profiles)
 
         def get_active_profile(self):
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                        profile = settings.get("active_profile", "Default")
-                        # Verify it exists
-                        if os.path.exists(os.path.join(profiles_dir, f"{profile}.json")):
-                            return profile
-                except:
-                    pass
+            profile = self._get_settings().get("active_profile", "Default")
+            # Verify it exists
+            if os.path.exists(os.path.join(profiles_dir, f"{profile}.json")):
+                return profile
             return "Default"
 
         def set_active_profile(self, profile_name):
-            settings = {}
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                except:
-                    pass
-            
-            settings["active_profile"] = profile_name
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f)
+            self._update_settings(active_profile=profile_name)
             return True
 
         def create_profile(self, profile_name):
@@ -122,8 +2340,7 @@ def create_app():
                 return {"error": "Profile already exists"}
             
             # Create empty rules
-            with open(path, 'w') as f:
-                json.dump([], f)
+            self._config.write(path, [])
             return {"success": True, "name": safe_name}
 
         def rename_profile(self, old_name, new_name):
@@ -144,6 +2361,7 @@ def create_app():
             
             try:
                 os.rename(old_path, new_path)
+                self._config.forget(old_path)
                 
                 # Update active profile if needed
                 if self.get_active_profile() == old_name:
@@ -160,6 +2378,7 @@ def create_app():
             path = os.path.join(profiles_dir, f"{profile_name}.json")
             if os.path.exists(path):
                 os.remove(path)
+                self._config.forget(path)
                 
                 # If we deleted the active one, switch to Default
                 if self.get_active_profile() == profile_name:
@@ -184,7 +2403,7 @@ def create_app():
                      url += '/community_rules.json'
 
             try:
-                response = requests.get(url)
+                response = self._clients.get_session().get(url)
                 if response.status_code == 200:
                     data = response.json()
                     # Firebase returns dict with keys, convert to list
@@ -214,7 +2433,7 @@ def create_app():
             
             try:
                 # Using POST to auto-generate ID
-                response = requests.post(url, json=rule_data)
+                response = self._clients.get_session().post(url, json=rule_data)
                 if response.status_code == 200:
                     return {"success": True}
                 elif response.status_code == 401:
@@ -237,84 +2456,83 @@ def create_app():
                 counter += 1
             
             path = os.path.join(profiles_dir, f"{base_name}.json")
-            with open(path, 'w') as f:
-                json.dump(rules, f)
+            self._config.write(path, rules)
             
             return {"success": True, "profile": base_name}
 
         def get_ai_config(self):
-            if os.path.exists(ai_config_file):
-                try:
-                    with open(ai_config_file, 'r') as f:
-                        return json.load(f)
-                except:
-                    return {}
-            return {}
+            return self._config.read(ai_config_file, {})
 
         def save_ai_config(self, config):
-            with open(ai_config_file, 'w') as f:
-                json.dump(config, f)
+            self._config.write(ai_config_file, config)
             return True
 
-        def _extract_content(self, file_path):
-            """
-            Extracts text content from various file types.
-            Returns text string or None if extraction failed/unsupported.
-            """
-            try:
-                # Check if file is accessible/valid size
-                if not os.path.exists(file_path) or os.path.getsize(file_path) == 0:
-                    return None
-                    
-                ext = os.path.splitext(file_path)[1].lower()
-                text = ""
-                
-                # 1. Text files
-                if ext in ['.txt', '.md', '.py', '.js', '.html', '.css', '.json', '.xml', '.c', '.cpp', '.h', '.java']:
-                    with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                        text = f.read()
-                
-                # 2. PDF
-                elif ext == '.pdf':
-                    with open(file_path, 'rb') as f:
-                        try:
-                            reader = PyPDF2.PdfReader(f)
-                            # Read max 5 pages to stay within limits roughly
-                            for i in range(min(len(reader.pages), 5)):
-                                page_text = reader.pages[i].extract_text()
-                                if page_text:
-                                    text += page_text + "\n"
-                        except Exception as e:
-                            print(f"PDF Error {file_path}: {e}")
-                            return None
-                
-                # 3. DOCX
-                elif ext == '.docx':
-                    try:
-                        doc = docx.Document(file_path)
-                        text = "\n".join([p.text for p in doc.paragraphs])
-                    except Exception as e:
-                        print(f"DOCX Error {file_path}: {e}")
-                        return None
-                
-                # 4. Images (OCR)
-                elif ext in ['.jpg', '.jpeg', '.png', '.bmp', '.tiff']:
-                    try:
-                        text = pytesseract.image_to_string(Image.open(file_path))
-                    except:
-                        return None
-                
-                if text:
-                    # Sanitize: Remove control characters that might break JSON later
-                    # Keep newlines, tabs, but remove others
-                    text = "".join(ch for ch in text if ch == '\n' or ch == '\t' or ch >= ' ')
-                    return text
-                    
-                return None
-            except Exception as e:
-                # Silently fail for individual files (e.g. cloud placeholders, locked files)
-                # print(f"Extraction error for {file_path}: {e}")
-                return None
+        def _shutdown(self):
+            """Releases background resources once the window is closed"""
+            self._config.flush()
+            if self._extraction_pool is not None:
+                self._extraction_pool.close()
+                self._extraction_pool = None
+            if self._content_cache is not None:
+                self._content_cache.close()
+                self._content_cache = None
+            self.stop_watch()
+            if self._history_store is not None:
+                self._history_store.close()
+                self._history_store = None
+            if self._snapshot_store is not None:
+                self._snapshot_store.close()
+                self._snapshot_store = None
+            self._clients.close()
+
+        def _get_snapshot_store(self):
+            if self._snapshot_store is None:
+                self._snapshot_store = SnapshotStore(snapshot_file)
+            return self._snapshot_store
+
+        def _get_history_store(self):
+            if self._history_store is None:
+                self._history_store = HistoryStore(history_db_file)
+            if not self._history_migrated:
+                try:
+                    self._history_store.migrate_json(history_file)
+                    self._history_migrated = True
+                except Exception as e:
+                    # Nothing was imported; history.json stays and is tried again next time
+                    print(f"Could not migrate {history_file}: {e}")
+            return self._history_store
+
+        def get_connection_stats(self):
+            """Client/session object reuse counters for the AI and community endpoints"""
+            return self._clients.get_stats()
+
+        def _get_content_cache(self):
+            if self._content_cache is None:
+                self._content_cache = ContentCache(content_cache_file)
+            return self._content_cache
+
+        def get_content_cache_stats(self):
+            """Hits/misses for this session plus entries and bytes on disk"""
+            return self._get_content_cache().stats()
+
+        def clear_content_cache(self):
+            self._get_content_cache().clear()
+            if os.path.exists(ocr_cache_file):
+                ocr_cache = OcrCache(ocr_cache_file)
+                ocr_cache.clear()
+                ocr_cache.close()
+            return True
+
+        def _get_extraction_pool(self, workers=None, timeout=None):
+            """Returns the shared ExtractionPool, recreated if the worker settings change"""
+            workers = int(workers) if workers else None
+            timeout = float(timeout) if timeout else 30
+            pool = self._extraction_pool
+            if pool is None or (workers and pool.workers != workers) or pool.timeout != timeout:
+                if pool is not None:
+                    pool.close()
+                self._extraction_pool = ExtractionPool(workers, timeout, ocr_cache_file)
+            return self._extraction_pool
 
         def run_ai_scan(self, config):
             api_key = config.get("api_key")
@@ -322,11 +2540,21 @@ def create_app():
             instructions = config.get("instructions", "")
             prioritize_rules = config.get("prioritize_rules", True)
             respect_ignore = config.get("respect_ignore", True)
+            dedupe = config.get("dedupe", False)
             
             # Pagination / Limits
             limit = int(config.get("batch_size", 15))
             offset = int(config.get("offset", 0))
             
+            # Concurrent mode: one call covers page_size files (0 = all remaining),
+            # sent as several batch_size requests in parallel
+            concurrency = int(config.get("concurrency", 1) or 1)
+            page_size = int(config.get("page_size", 0) or 0)
+            
+            # Adaptive batching: pack requests by estimated tokens instead of batch_size (0 = off)
+            token_budget = int(config.get("token_budget", 0) or 0)
+            planner = self._get_batch_planner(token_budget) if token_budget > 0 else None
+            
             # OpenAI Config
             base_url = config.get("base_url", "https://api.sambanova.ai/v1")
             model_name = config.get("model_name", "Meta-Llama-3.1-8B-Instruct")
@@ -343,37 +2571,23 @@ def create_app():
             
             # 1. Scan files
             try:
-                all_files = [f for f in os.listdir(target_path) 
-                             if os.path.isfile(os.path.join(target_path, f)) 
-                             and not f.startswith('.')]
-                all_files.sort() # Ensure deterministic order for pagination
+                entries = {e.name: e for e in list_files(target_path, with_stat=(mode == "content" or dedupe))}
+                all_files = sorted(entries) # Ensure deterministic order for pagination
                 
                 # Check ignore/include lists
-                ignore_patterns = self.get_ignore_list()
-                include_patterns = self.get_include_list()
-                filter_mode = self.get_filter_mode()
-
-                valid_files = []
-                for f in all_files:
-                    # Check filter logic
-                    should_skip = False
-                    if respect_ignore:
-                        if filter_mode == "exclude":
-                            for pattern in ignore_patterns:
-                                if fnmatch.fnmatch(f, pattern):
-                                    should_skip = True
-                                    break
-                        else: # include
-                            matches_include = False
-                            for pattern in include_patterns:
-                                if fnmatch.fnmatch(f, pattern):
-                                    matches_include = True
-                                    break
-                            if not matches_include:
-                                should_skip = True
-
-                    if not should_skip:
-                        valid_files.append(f)
+                if respect_ignore:
+                    file_filter = self._get_file_filter()
+                    valid_files = [f for f in all_files if file_filter.allows(f)]
+                else:
+                    valid_files = all_files
+                
+                # Only one copy of identical files goes to the AI; the rest reuse its answer
+                duplicates = {}
+                if dedupe:
+                    for group in self._get_duplicate_groups([entries[f] for f in valid_files]):
+                        duplicates[group[0].name] = [e.name for e in group[1:]]
+                    skipped = set(name for copies in duplicates.values() for name in copies)
+                    valid_files = [f for f in valid_files if f not in skipped]
                 
                 total_valid = len(valid_files)
 
@@ -384,7 +2598,10 @@ def create_app():
                         return {"error": "All files filtered out by Ignore/Include list."}
 
                 # Apply Pagination
-                files_to_scan = valid_files[offset : offset + limit]
+                if concurrency > 1:
+                    files_to_scan = valid_files[offset : offset + page_size] if page_size else valid_files[offset:]
+                else:
+                    files_to_scan = valid_files[offset : offset + limit]
                 
                 if not files_to_scan:
                     return {
@@ -394,155 +2611,296 @@ def create_app():
                         "is_complete": True
                     }
                 
+                # Pre-match rules locally so the model sees which folder applies
+                compiled_rules = self._get_compiled_rules() if prioritize_rules else None
+                rules = compiled_rules.rules if compiled_rules else self.get_rules()
+
                 for f in files_to_scan:
                     file_info = {"name": f}
                     
-                    if mode == "content":
-                        full_path = os.path.join(target_path, f)
-                        content = self._extract_content(full_path)
-                        
-                        if content:
-                            # Check limits: 10,000 chars OR 400 lines
-                            if len(content) > 10000 or content.count('\n') > 400:
-                                pass 
-                            else:
-                                try:
-                                    # Summarize
-                                    parser = PlaintextParser.from_string(content, Tokenizer("english"))
-                                    summarizer = LsaSummarizer()
-                                    summary = summarizer(parser.document, 5) # Top 5 sentences
-                                    summary_text = " ".join([str(s) for s in summary])
-                                    file_info["summary"] = summary_text[:400] 
-                                except Exception as e:
-                                    pass # Skip content if summarization fails
+                    if compiled_rules:
+                        rule_folder = compiled_rules.classify(f)
+                        if rule_folder:
+                            file_info["rule_folder"] = rule_folder
                     
                     files_to_analyze.append(file_info)
+                
+                sequential_plan = planner is not None and concurrency <= 1
+                if sequential_plan:
+                    # Only one request goes out per call, so only prepare what it can hold.
+                    # Summaries only add to a file's cost: the name-only first batch is an upper bound.
+                    base_tokens = estimate_tokens(build_ai_prompt(instructions, prioritize_rules, rules, []))
+                    files_to_analyze = planner.plan(base_tokens, files_to_analyze)[0]
+                    files_to_scan = files_to_scan[:len(files_to_analyze)]
+                
+                if mode == "content":
+                    summarizer = config.get("summarizer") or DEFAULT_SUMMARIZER
+                    if summarizer not in SUMMARIZERS:
+                        summarizer = DEFAULT_SUMMARIZER
+                    summaries_final = True
+                    if summarizer == "lsa":
+                        # Fetch tokenizer data in the background if this install doesn't have it yet
+                        start_nltk_download()
+                        summaries_final = ensure_nltk_data()
+                    cache = self._get_content_cache()
+                    verify_hash = config.get("cache_verify_hash", False)
+                    pool = self._get_extraction_pool(config.get("content_workers"), config.get("content_timeout"))
+                    
+                    def summarize(start, stop):
+                        """Fills in the summaries of files_to_scan[start:stop]"""
+                        to_extract = []
+                        # Unchanged files are served from the cache
+                        for i in range(start, stop):
+                            entry = entries[files_to_scan[i]]
+                            content_hash = cached = None
+                            try:
+                                if verify_hash:
+                                    content_hash = file_hash(entry.path)
+                                cached = cache.get(entry.path, entry.size, entry.mtime, content_hash, summarizer)
+                            except OSError as e:
+                                # Locked or gone: treat it as a miss, extraction decides
+                                print(f"Couldn't hash {entry.path}: {e}")
+                            if cached is not None:
+                                if cached["summary"]:
+                                    files_to_analyze[i]["summary"] = cached["summary"]
+                            else:
+                                to_extract.append((i, entry, content_hash))
+                        
+                        if to_extract:
+                            # Extract + summarize in parallel, results stay in file order
+                            results = pool.map([(entry.path, entry.size, summarizer, summaries_final)
+                                                for _, entry, _ in to_extract])
+                            
+                            fresh = []
+                            for (i, entry, content_hash), result in zip(to_extract, results):
+                                if result is None:
+                                    continue # Failed/timed out: don't remember it
+                                digest, summary = result
+                                if summary:
+                                    files_to_analyze[i]["summary"] = summary
+                                fresh.append((entry.path, entry.size, entry.mtime, content_hash, digest, summary, summarizer))
+                            # Head-of-text fallbacks (no tokenizer data yet) are not worth remembering
+                            if summaries_final:
+                                cache.put_many(fresh)
+                    
+                    if sequential_plan:
+                        # A few files at a time, stopping once the first request is full
+                        done = 0
+                        while done < len(files_to_scan):
+                            step = min(len(files_to_scan), done + pool.workers)
+                            summarize(done, step)
+                            done = step
+                            if len(planner.plan(base_tokens, files_to_analyze[:done])[0]) < done:
+                                break
+                        files_to_analyze = files_to_analyze[:done]
+                        files_to_scan = files_to_scan[:done]
+                    else:
+                        summarize(0, len(files_to_scan))
 
             except Exception as e:
                 return {"error": f"Scan Error: {str(e)}"}
 
             # 2. Call OpenAI Compatible API
             try:
-                from openai import OpenAI
-                
-                client = OpenAI(
-                    api_key=api_key,
-                    base_url=base_url
-                )
-
-                # Get Rules for context
-                rules = self.get_rules()
-                
-                prompt = f"""
-                You are a smart file organizer.
-                
-                User Instructions: {instructions if instructions else "Sort these files into logical folders based on name and content."}
-                
-                {f"1. STRICTLY Follow the User's Rules below if they match." if prioritize_rules else "1. IGNORE the User's Rules if they are too generic. Prioritize creating specific subfolders based on the file's unique context."}
-                2. Follow the User's Custom Instructions below.
-                3. Analyze the **FULL filename** for context (keywords, dates, project names), NOT just the extension.
-                4. **OUTPUT FORMAT**: Return a **SINGLE LINE** of valid JSON. **NO NEWLINES**. **NO INDENTATION**.
+                # Streaming: show each suggestion in the UI as soon as it is parsed
+                on_suggestion = self._push_ai_suggestion if config.get("stream", False) else None
                 
-                IMPORTANT PRIORITIES:
-                - Group related files (e.g. "Invoice_Jan.pdf", "Invoice_Feb.pdf" -> "Invoices")
-                - Create generic folders ONLY if no specific context exists (e.g. "Documents", "Images")
-                - If a file is "unknown" or "trash", suggest a "Misc" or "Review" folder.
-                
-                Return ONLY a JSON object with this structure:
-                {{"suggestions":[{{"file":"filename.ext","folder":"SuggestedFolder","reason":"Short reason (max 5 words)"}}]}}
-                
-                User's Rules:
-                {json.dumps(rules) if prioritize_rules else "[]"}
-
-                Files to Analyze:
-                {json.dumps(files_to_analyze)}
-                """
-
-                response = client.chat.completions.create(
-                    model=model_name,
-                    messages=[
-                        {"role": "system", "content": "You are a helpful file organization assistant that outputs JSON only."},
-                        {"role": "user", "content": prompt}
-                    ],
-                    temperature=0.1,
-                    stream=False
-                )
+                # Split into requests: by token estimate, or fixed batch_size
+                if planner:
+                    base_tokens = estimate_tokens(build_ai_prompt(instructions, prioritize_rules, rules, []))
+                    batches = planner.plan(base_tokens, files_to_analyze)
+                else:
+                    batches = [files_to_analyze[i:i + limit] for i in range(0, len(files_to_analyze), limit)]
                 
-                content = response.choices[0].message.content
+                processed = len(files_to_scan)
+                failed_batches = []
                 
-                # Extract JSON if wrapped in markdown
-                if "```json" in content:
-                    content = content.split("```json")[1].split("```")[0].strip()
-                elif "```" in content:
-                    content = content.split("```")[1].split("```")[0].strip()
-                    
-                # Handle strict=False for potential control characters
-                try:
-                    parsed = json.loads(content, strict=False)
-                except json.JSONDecodeError:
-                    # Fallback: Aggressive Repair
+                if concurrency <= 1 or len(batches) == 1:
+                    # Sequential paging: one request per call, the UI asks for the rest
+                    batch = batches[0]
+                    client = self._clients.get_openai(api_key, base_url)
+                    prompt = build_ai_prompt(instructions, prioritize_rules, rules, batch)
                     try:
-                        # 1. Clean up whitespace/markdown
-                        content = content.strip()
-                        if content.startswith("```json"): content = content[7:]
-                        if content.startswith("```"): content = content[3:]
-                        if content.endswith("```"): content = content[:-3]
-                        content = content.strip()
-                        
-                        # 2. Try to find the array start
-                        start_idx = content.find('[')
-                        if start_idx == -1: raise Exception("No array found")
-                        
-                        # 3. Find the last closing brace '}' to cut off incomplete objects
-                        last_brace_idx = content.rfind('}')
-                        if last_brace_idx == -1: raise Exception("No objects found")
-                        
-                        # Keep only up to the last valid object
-                        valid_content = content[start_idx:last_brace_idx+1]
-                        
-                        # Close the array and object
-                        fixed_json = f'{{"suggestions": {valid_content}]}}'
-                        
-                        parsed = json.loads(fixed_json, strict=False)
-                    except:
-                         # 3. Nuclear Option: Regex extract specific fields
-                         try:
-                             suggestions = []
-                             matches = re.findall(r'"file"\s*:\s*"(.*?)",\s*"folder"\s*:\s*"(.*?)",\s*"reason"\s*:\s*"(.*?)"', content)
-                             for m in matches:
-                                 suggestions.append({
-                                     "file": m[0],
-                                     "folder": m[1],
-                                     "reason": m[2]
-                                 })
-                             
-                             if not suggestions: raise Exception("Regex failed")
-                             parsed = {"suggestions": suggestions}
-                         except:
-                             return {"error": f"AI Response Invalid/Truncated. Raw: {content[:100]}..."}
-
-                self.ai_results = parsed.get("suggestions", [])
+                        self.ai_results, finish_reason = request_suggestions(client, model_name, prompt, on_suggestion=on_suggestion)
+                    except ValueError as e:
+                        if planner:
+                            planner.record(True) # Unparseable output is almost always cut off
+                        return {"error": str(e)}
+                    
+                    processed = len(batch)
+                    if planner:
+                        truncated = finish_reason == "length"
+                        planner.record(truncated)
+                        if truncated:
+                            # Resume after the last file that got an answer; the rest goes in the next (smaller) batch
+                            names = [info["name"] for info in batch]
+                            answered = [names.index(s.get("file")) for s in self.ai_results if s.get("file") in names]
+                            processed = max(answered) + 1 if answered else 1
+                else:
+                    self.ai_results, failed_batches = self._run_concurrent_batches(
+                        batches, concurrency, config, api_key, base_url, model_name,
+                        instructions, prioritize_rules, rules, on_suggestion, planner
+                    )
+                    if failed_batches and not self.ai_results:
+                        return {"error": failed_batches[0]}
                 
                 if not self.ai_results:
                         return {"error": "AI analyzed the files but returned no suggestions. Try changing your instructions."}
+                
+                if duplicates:
+                    self.ai_results = fan_out_duplicates(self.ai_results, duplicates)
                         
                 return {
                     "success": True, 
                     "results": self.ai_results,
-                    "processed": len(files_to_scan),
+                    "processed": processed,
                     "total_valid": total_valid,
-                    "is_complete": (offset + len(files_to_scan)) >= total_valid
+                    "is_complete": (offset + processed) >= total_valid,
+                    "failed_batches": failed_batches
                 }
 
             except Exception as e:
                 return {"error": f"API Error: {str(e)}"}
 
+        def _push_ai_suggestion(self, suggestion):
+            try:
+                webview.windows[0].evaluate_js(f'window.aiSuggestion({json.dumps(suggestion)})')
+            except Exception:
+                pass # UI not ready/closed: results are still returned at the end
+
+        def _get_duplicate_groups(self, entries):
+            """find_duplicate_groups, cached while the set of (name, size, mtime) is unchanged"""
+            signature = hash(tuple(sorted((e.path, e.size, e.mtime) for e in entries)))
+            if self._duplicate_cache is None or self._duplicate_cache[0] != signature:
+                self._duplicate_cache = (signature, find_duplicate_groups(entries))
+            return self._duplicate_cache[1]
+
+        def find_duplicates(self):
+            """Reports groups of identical files in the target folder and the bytes they waste"""
+            target_path = self.get_target_path()
+            try:
+                groups = self._get_duplicate_groups(list_files(target_path))
+            except Exception as e:
+                return {"error": str(e)}
+            
+            report = []
+            for group in groups:
+                report.append({
+                    "files": [e.name for e in group],
+                    "size": group[0].size,
+                    "reclaimable": group[0].size * (len(group) - 1)
+                })
+            
+            return {
+                "groups": report,
+                "duplicate_files": sum(len(g) - 1 for g in groups),
+                "reclaimable_bytes": sum(g["reclaimable"] for g in report)
+            }
+
+        def _get_batch_planner(self, token_budget):
+            """Planner state survives across pages so truncation feedback carries over"""
+            if self._batch_planner is None or self._batch_planner.max_budget != token_budget:
+                self._batch_planner = BatchPlanner(token_budget)
+            return self._batch_planner
+
+        def _run_concurrent_batches(self, batches, concurrency, config, api_key, base_url, model_name,
+                                    instructions, prioritize_rules, rules, on_suggestion=None, planner=None):
+            """
+            Sends the batches in parallel. When a reply is cut off midway, the files
+            it didn't get to are sent again as a new batch.
+            Returns (suggestions in file order, list of error messages for failed batches).
+            """
+            # Retries are handled here (with the rate limiter), not by the client.
+            # with_options shares the pooled HTTP connections of the cached client.
+            client = self._clients.get_openai(api_key, base_url).with_options(max_retries=0)
+
+            rpm = float(config.get("requests_per_minute", 0) or 0)
+            limiter = RateLimiter(rpm / 60.0, concurrency) if rpm > 0 else None
+            max_retries = int(config.get("max_retries", 3))
+
+            base_tokens = estimate_tokens(build_ai_prompt(instructions, prioritize_rules, rules, []))
+            suggestions = []
+            failed = [] # (batch index, message)
+
+            with ThreadPoolExecutor(max_workers=concurrency) as executor:
+                futures = {}
+
+                def send(index, batch):
+                    prompt = build_ai_prompt(instructions, prioritize_rules, rules, batch)
+                    future = executor.submit(request_suggestions, client, model_name, prompt, limiter, max_retries, on_suggestion)
+                    futures[future] = (index, batch)
+
+                for index, batch in enumerate(batches):
+                    send(index, batch)
+
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        index, batch = futures.pop(future)
+                        try:
+                            batch_suggestions, finish_reason = future.result()
+                        except Exception as e:
+                            if planner and isinstance(e, ValueError):
+                                planner.record(True)
+                            failed.append((index, f"Batch {index + 1}: {str(e)}"))
+                            continue
+
+                        truncated = finish_reason == "length"
+                        if planner:
+                            planner.record(truncated)
+                        suggestions.extend(batch_suggestions)
+
+                        if truncated:
+                            answered = set(s.get("file") for s in batch_suggestions)
+                            tail = [info for info in batch if info["name"] not in answered]
+                            if tail and len(tail) < len(batch):
+                                # Cut off midway: send the rest again (in smaller pieces once the planner shrank)
+                                for part in (planner.plan(base_tokens, tail) if planner else [tail]):
+                                    send(index, part)
+                            elif tail:
+                                failed.append((index, f"Batch {index + 1}: reply cut off, {len(tail)} files unanswered"))
+
+            # Merge back in file order (unknown names from the model go last)
+            order = {info["name"]: i for i, info in enumerate([info for batch in batches for info in batch])}
+            suggestions.sort(key=lambda s: order.get(s.get("file"), len(order)))
+
+            # By batch number ("Batch 2" before "Batch 10")
+            return suggestions, [message for _, message in sorted(failed, key=lambda item: item[0])]
+
+        def _exclusive(self, func):
+            """Wraps a run so it holds the move lock (two runs would hand out the same free names)"""
+            def run():
+                with self._move_lock:
+                    func()
+            return run
+
         def apply_ai_changes(self, approved_files):
+            with self._move_lock:
+                return self._apply_ai_changes(approved_files)
+
+        def _apply_ai_changes(self, approved_files):
             target_path = self.get_target_path()
             moved_count = 0
             errors = 0
             
             undo_log = []
+            date = time.strftime("%Y-%m-%d %H:%M:%S") + " (AI)"
+            journal = self._open_journal(date, target_path)
+            ui = UIEventBus().start()
+            executor = MoveExecutor()
+            pending = []
+            unjournaled = {}
+            
+            def log_move(future, src, entry):
+                if future.exception() is None:
+                    try:
+                        journal.record(src, future.result())
+                    except Exception as e:
+                        # Moved, but a crash now would lose it: report it
+                        unjournaled[src] = e
+                        ui.log({"file": entry["file"], "category": entry["category"], "status": "Error", "details": f"Moved but not journaled: {e}"})
+                        return
+                    ui.log(entry)
             
             for item in approved_files:
                 filename = item['file']
@@ -555,51 +2913,34 @@ def create_app():
                     dst_dir = folder
                 else:
                     dst_dir = os.path.join(target_path, folder)
-                    
-                dst = os.path.join(dst_dir, filename)
                 
                 if os.path.exists(src):
-                    try:
-                        if not os.path.exists(dst_dir):
-                            os.makedirs(dst_dir)
-                            
-                        # Handle dupes
-                        if os.path.exists(dst):
-                            base, ext = os.path.splitext(filename)
-                            counter = 1
-                            while os.path.exists(os.path.join(dst_dir, f"{base}_{counter}{ext}")):
-                                counter += 1
-                            dst = os.path.join(dst_dir, f"{base}_{counter}{ext}")
-                            
-                        shutil.move(src, dst)
-                        moved_count += 1
-                        undo_log.append({"original_path": src, "new_path": dst})
-                        
-                        webview.windows[0].evaluate_js(f'window.logAction({json.dumps({"file": filename, "category": folder, "status": "Moved (AI)"})})')
-                    except Exception as e:
+                    future = executor.submit(src, dst_dir, filename)
+                    future.add_done_callback(lambda f, src=src, entry={"file": filename, "category": folder, "status": "Moved (AI)"}: log_move(f, src, entry))
+                    pending.append((src, future))
+            
+            executor.shutdown()
+            
+            # Undo log keeps the order the moves were requested in
+            for src, future in pending:
+                try:
+                    dst = future.result()
+                    # Still undoable from history even when journaling failed
+                    undo_log.append({"original_path": src, "new_path": dst})
+                    if src in unjournaled:
                         errors += 1
-                        print(e)
+                    else:
+                        moved_count += 1
+                except Exception as e:
+                    errors += 1
+                    print(e)
+            
+            ui.finish()
             
             # Save history
-            if moved_count > 0:
-                session_data = {
-                    "id": int(time.time()),
-                    "date": time.strftime("%Y-%m-%d %H:%M:%S") + " (AI)",
-                    "path": target_path,
-                    "moves": undo_log
-                }
-                
-                history = []
-                if os.path.exists(history_file):
-                    try:
-                        with open(history_file, 'r') as f:
-                            history = json.load(f)
-                    except:
-                        pass
-                
-                history.append(session_data)
-                with open(history_file, 'w') as f:
-                    json.dump(history, f)
+            if undo_log:
+                self._get_history_store().add_session(date, target_path, undo_log)
+            journal.discard()
 
             return {"moved": moved_count, "errors": errors}
 
@@ -608,12 +2949,9 @@ def create_app():
             active_profile = self.get_active_profile()
             profile_path = os.path.join(profiles_dir, f"{active_profile}.json")
             
-            if os.path.exists(profile_path):
-                try:
-                    with open(profile_path, 'r') as f:
-                        return json.load(f)
-                except:
-                    pass
+            rules = self._config.read(profile_path)
+            if rules is not None:
+                return rules
             
             # Default rules if none exist or profile broken
             defaults = [
@@ -626,43 +2964,36 @@ def create_app():
             
             # If default profile doesn't exist, create it with defaults
             if active_profile == "Default" and not os.path.exists(profile_path):
-                with open(profile_path, 'w') as f:
-                    json.dump(defaults, f)
+                self._config.write(profile_path, defaults)
                     
             return defaults
 
+        def _get_compiled_rules(self, rules=None):
+            """Returns CompiledRules for the active profile, rebuilt only when the rules change"""
+            if rules is None:
+                rules = self.get_rules()
+            signature = json.dumps(rules, sort_keys=True)
+            if self._compiled_rules is None or self._compiled_rules.signature != signature:
+                self._compiled_rules = CompiledRules(rules)
+            return self._compiled_rules
+
         def save_rules(self, rules):
             active_profile = self.get_active_profile()
             profile_path = os.path.join(profiles_dir, f"{active_profile}.json")
             
-            with open(profile_path, 'w') as f:
-                json.dump(rules, f)
+            self._config.write(profile_path, rules)
             return True
             
         def get_target_path(self):
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                        path = settings.get("target_path")
-                        if path and os.path.exists(path):
-                            return path
-                except:
-                    pass
+            path = self._get_settings().get("target_path")
+            if path and os.path.exists(path):
+                return path
             return os.path.join(os.path.expanduser("~"), "Downloads")
 
         def set_target_path(self, path):
-            settings = {}
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                except:
-                    pass
-            
-            settings["target_path"] = path
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f)
+            self._update_settings(target_path=path)
+            if self._watcher is not None:
+                self.start_watch() # Follow the new folder
         
         def select_folder(self):
             folder = webview.windows[0].create_file_dialog(webview.FOLDER_DIALOG)
@@ -705,97 +3036,229 @@ def create_app():
             return None
 
         def get_ignore_list(self):
-            if os.path.exists(ignore_file):
-                try:
-                    with open(ignore_file, 'r') as f:
-                        return json.load(f)
-                except:
-                    return []
-            return []
+            return self._config.read(ignore_file, [])
 
         def save_ignore_list(self, patterns):
-            with open(ignore_file, 'w') as f:
-                json.dump(patterns, f)
+            self._config.write(ignore_file, patterns)
+            self._file_filter = None
             return True
 
         def get_include_list(self):
-            if os.path.exists(include_file):
-                try:
-                    with open(include_file, 'r') as f:
-                        return json.load(f)
-                except:
-                    return []
-            return []
+            return self._config.read(include_file, [])
 
         def save_include_list(self, patterns):
-            with open(include_file, 'w') as f:
-                json.dump(patterns, f)
+            self._config.write(include_file, patterns)
+            self._file_filter = None
             return True
         
         def get_filter_mode(self):
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                        return settings.get("filter_mode", "exclude")
-                except:
-                    pass
-            return "exclude"
+            return self._get_settings().get("filter_mode", "exclude")
 
         def set_filter_mode(self, mode):
-            settings = {}
-            if os.path.exists(settings_file):
-                try:
-                    with open(settings_file, 'r') as f:
-                        settings = json.load(f)
-                except:
-                    pass
-            
-            settings["filter_mode"] = mode
-            with open(settings_file, 'w') as f:
-                json.dump(settings, f)
+            self._update_settings(filter_mode=mode)
+            self._file_filter = None
+            return True
+
+        def _get_file_filter(self):
+            """Returns the compiled FileFilter, rebuilt when the lists or filter mode change"""
+            mode, ignore, include = self.get_filter_mode(), self.get_ignore_list(), self.get_include_list()
+            cached = self._file_filter
+            if cached is None or cached[0] != mode or cached[1] != ignore or cached[2] != include:
+                self._file_filter = (mode, ignore, include, FileFilter(mode, ignore, include))
+            return self._file_filter[3]
+
+        def get_turbo_mode(self):
+            """Turbo mode: the UI skips its log animation (the backend never waits either way)"""
+            return self._get_settings().get("turbo_mode", False)
+
+        def set_turbo_mode(self, enabled):
+            self._update_settings(turbo_mode=bool(enabled))
+            return True
+
+        def get_recursive_mode(self):
+            """Recursive organize: also sort files in subfolders, up to max_depth levels down"""
+            recursive = {"enabled": False, "max_depth": 10}
+            recursive.update(self._get_settings().get("recursive", {}))
+            return recursive
+
+        def set_recursive_mode(self, enabled, max_depth=10):
+            self._update_settings(recursive={"enabled": bool(enabled), "max_depth": max(1, int(max_depth))})
+            return True
+
+        def get_incremental_mode(self):
+            """Incremental organize: only evaluate files that are new or changed since the last run"""
+            return self._get_settings().get("incremental", False)
+
+        def set_incremental_mode(self, enabled):
+            self._update_settings(incremental=bool(enabled))
+            return True
+
+        def _snapshot_signature(self, compiled_rules):
+            """Everything a file's decision depends on besides its name"""
+            file_filter = self._get_file_filter()
+            return json.dumps({
+                "rules": compiled_rules.signature,
+                "filter": [file_filter.mode, sorted(self.get_ignore_list()), sorted(self.get_include_list())],
+                "recursive": self.get_recursive_mode()
+            }, sort_keys=True)
+
+        def _iter_target_files(self, folder, compiled_rules=None, with_stat=False, with_inode=False):
+            """
+            Files to organize in folder: the top level, or the whole tree (minus the
+            rule destination folders) when recursive mode is on.
+            """
+            recursive = self.get_recursive_mode()
+            if not recursive["enabled"]:
+                return list_files(folder, with_stat=with_stat, with_inode=with_inode)
+
+            compiled_rules = compiled_rules or self._get_compiled_rules()
+            skip_dirs = set()
+            for rule in compiled_rules.rules:
+                target_folder = rule.get("folder")
+                if target_folder:
+                    skip_dirs.add(target_folder if os.path.isabs(target_folder) else os.path.join(folder, target_folder))
+            return walk_files(folder, recursive["max_depth"], skip_dirs, with_stat=with_stat, with_inode=with_inode)
+
+        # --- Watch mode ---
+        def get_watch_mode(self):
+            """Watch mode: organize new files in the target folder as soon as they finish downloading"""
+            watch = {"enabled": False, "stable_seconds": 2.0, "batch_window": 5.0}
+            watch.update(self._get_settings().get("watch", {}))
+            return watch
+
+        def set_watch_mode(self, enabled):
+            watch = dict(self.get_watch_mode())
+            watch["enabled"] = bool(enabled)
+            self._update_settings(watch=watch)
+            if enabled:
+                self.start_watch()
+            else:
+                self.stop_watch()
+            return self.get_watch_status()
+
+        def get_watch_status(self):
+            watcher = self._watcher
+            return {
+                "running": bool(watcher and watcher.running),
+                "backend": watcher.backend if watcher else None,
+                "path": watcher.folder if watcher else None
+            }
+
+        def start_watch(self, folder=None):
+            """
+            Starts (or restarts, e.g. after the target folder changed) the folder watcher.
+            folder defaults to the saved target folder and is not saved itself.
+            """
+            self.stop_watch()
+            watch = self.get_watch_mode()
+            folder = folder or self.get_target_path()
+            self._watcher = FolderWatcher(
+                folder, lambda names: self._organize_watch_batch(names, folder),
+                stable_seconds=float(watch["stable_seconds"]), batch_window=float(watch["batch_window"])
+            ).start()
+            return self._watcher
+
+        def stop_watch(self):
+            if self._watcher is not None:
+                self._watcher.stop()
+                self._watcher = None
+            return True
+
+        def _organize_watch_batch(self, names, target_path):
+            """Runs one batch of settled new files through the filter and rules; one history session per batch"""
+            with self._move_lock:
+                compiled_rules = self._get_compiled_rules()
+                file_filter = self._get_file_filter()
+
+                date = time.strftime("%Y-%m-%d %H:%M:%S") + " (Watch)"
+                journal = self._open_journal(date, target_path)
+                # Batches are usually a file or two: probe for free names instead of listing the destination
+                executor = MoveExecutor(probe_limit=32)
+                logs = []
+
+                def on_moved(future, seq, src, target_folder):
+                    if future.exception() is not None:
+                        print(f"Watch: could not move {src}: {future.exception()}")
+                        return
+                    dst = future.result()
+                    try:
+                        journal.record(src, dst, seq)
+                    except Exception as e:
+                        print(f"Watch: moved {src} to {dst} but could not journal it: {e}")
+                        return
+                    logs.append({"file": os.path.basename(dst), "category": target_folder, "status": "Moved (Watch)"})
+
+                for seq, filename in enumerate(names):
+                    if not file_filter.allows(filename):
+                        continue
+                    target_folder = compiled_rules.classify(filename)
+                    if not target_folder:
+                        continue
+                    if os.path.isabs(target_folder):
+                        target_dir = target_folder
+                    else:
+                        target_dir = os.path.join(target_path, target_folder)
+
+                    src = os.path.join(target_path, filename)
+                    future = executor.submit(src, target_dir, filename)
+                    future.add_done_callback(lambda f, seq=seq, src=src, target_folder=target_folder: on_moved(f, seq, src, target_folder))
+
+                executor.shutdown()
+                if logs:
+                    # Journal is in completion order; each move's seq puts it back in request order
+                    self._get_history_store().add_session(date, target_path, journal.moves())
+                journal.discard()
+
+            if logs:
+                if webview.windows:
+                    webview.windows[0].evaluate_js(f'window.watchEvents({json.dumps(logs)})')
+                else:
+                    for entry in logs:
+                        print(f"Watch: {entry['file']} -> {entry['category']}")
+
+        def get_journal_settings(self):
+            """How often the move journal is fsynced: every N moves or every N seconds"""
+            journal_settings = {"sync_every": 256, "sync_interval": 1.0}
+            journal_settings.update(self._get_settings().get("journal", {}))
+            return journal_settings
+
+        def set_journal_settings(self, journal_settings):
+            self._update_settings(journal={
+                "sync_every": max(1, int(journal_settings.get("sync_every", 256))),
+                "sync_interval": max(0.0, float(journal_settings.get("sync_interval", 1.0)))
+            })
             return True
 
+        def _open_journal(self, date, path):
+            journal_settings = self.get_journal_settings()
+            return MoveJournal(journal_dir, date, path,
+                               sync_every=journal_settings["sync_every"],
+                               sync_interval=journal_settings["sync_interval"])
+
         def get_history(self):
-            if os.path.exists(history_file):
-                try:
-                    with open(history_file, 'r') as f:
-                        history = json.load(f)
-                        # Return summary only
-                        summary = []
-                        for session in history:
-                            summary.append({
-                                "id": session["id"],
-                                "date": session["date"],
-                                "path": session["path"],
-                                "count": len(session["moves"])
-                            })
-                        # Sort by date desc
-                        return sorted(summary, key=lambda x: x["id"], reverse=True)
-                except:
-                    return []
-            return []
+            try:
+                # Summaries only, newest first
+                return self._get_history_store().list_sessions()
+            except Exception as e:
+                print(f"Error loading history: {e}")
+                return []
 
         def restore_session(self, session_id):
-            if not os.path.exists(history_file):
-                return
+            store = self._get_history_store()
             
             def run_restore():
+                ui = UIEventBus().start()
                 try:
-                    with open(history_file, 'r') as f:
-                        history = json.load(f)
-                    
                     # Find session
-                    session = next((s for s in history if s["id"] == session_id), None)
+                    session = store.get_session(session_id)
                     if not session:
                         raise Exception("Session not found")
                         
-                    moves = session["moves"]
-                    total = len(moves)
+                    total = session["count"]
                     restored = 0
                     
-                    # Reverse order
-                    for i, entry in enumerate(reversed(moves)):
+                    # Reverse order, streamed from the store a page at a time
+                    for i, entry in enumerate(store.iter_moves(session_id, reverse=True)):
                         src = entry['new_path']
                         dst = entry['original_path']
                         
@@ -809,25 +3272,21 @@ def create_app():
                                 if not os.listdir(folder):
                                     os.rmdir(folder)
                                 
-                                webview.windows[0].evaluate_js(f'window.logAction({json.dumps({"file": os.path.basename(dst), "category": "Restored", "status": "Undo"})})')
+                                ui.log({"file": os.path.basename(dst), "category": "Restored", "status": "Undo"})
                             except Exception as e:
                                 print(f"Error restoring {src}: {e}")
                         
-                        progress = ((i + 1) / total) * 100
-                        webview.windows[0].evaluate_js(f'window.updateProgress({progress})')
-                        time.sleep(0.01)
-
-                    # Remove session from history and save
-                    new_history = [s for s in history if s["id"] != session_id]
-                    with open(history_file, 'w') as f:
-                        json.dump(new_history, f)
+                        ui.progress(((i + 1) / total) * 100)
+
+                    # Remove session from history
+                    store.delete_session(session_id)
                         
-                    webview.windows[0].evaluate_js(f'window.undoComplete({restored})')
+                    ui.finish(f'window.undoComplete({restored})')
                     
                 except Exception as e:
-                    webview.windows[0].evaluate_js(f'window.cleaningError("Restore failed: {str(e)}")')
+                    ui.finish(f'window.cleaningError("Restore failed: {str(e)}")')
 
-            threading.Thread(target=run_restore).start()
+            threading.Thread(target=self._exclusive(run_restore)).start()
 
         def _get_display_path(self, full_path):
             home = os.path.expanduser("~")
@@ -863,122 +3322,139 @@ def create_app():
         def scan_downloads(self):
             downloads_path = self.get_target_path()
             display_path = self._get_display_path(downloads_path)
-            files = []
             try:
-                for f in os.listdir(downloads_path):
-                    full_path = os.path.join(downloads_path, f)
-                    if os.path.isfile(full_path) and not f.startswith('.'):
-                        files.append(f)
+                count = sum(1 for _ in self._iter_target_files(downloads_path))
             except Exception as e:
                 return {"error": str(e)}
             
-            return {"count": len(files), "path": downloads_path, "display_path": display_path}
+            return {"count": count, "path": downloads_path, "display_path": display_path}
 
-        def organize_files(self):
+        def organize_files(self, incremental=None):
             self.stop_cleaning = False
             downloads_path = self.get_target_path()
+            if incremental is None:
+                incremental = self.get_incremental_mode()
             
-            # Load rules
-            rules = self.get_rules()
+            # Load rules (compiled once per run)
+            compiled_rules = self._get_compiled_rules()
 
             def run_organizer():
-                moved_count = 0
-                errors = 0
-                undo_log = []
+                counts = {"moved": 0, "errors": 0}
                 
                 # Load filter mode and patterns
-                filter_mode = self.get_filter_mode()
-                ignore_patterns = self.get_ignore_list()
-                include_patterns = self.get_include_list()
+                file_filter = self._get_file_filter()
                 
+                ui = UIEventBus().start()
                 try:
-                    files = [f for f in os.listdir(downloads_path) 
-                             if os.path.isfile(os.path.join(downloads_path, f)) 
-                             and not f.startswith('.')]
+                    recursive = self.get_recursive_mode()["enabled"]
+                    snapshot_store = previous = None
+                    seen = {} # Files left in place this run -> (inode, size, mtime_ns, decision)
+                    if incremental:
+                        snapshot_store = self._get_snapshot_store()
+                        signature = self._snapshot_signature(compiled_rules)
+                        taken_at_ns = time.time_ns()
+                        dir_mtime_ns = os.stat(downloads_path).st_mtime_ns
+                        previous = snapshot_store.load(downloads_path, signature)
+                        # Folder untouched since the last run: nothing new to look at
+                        if previous is not None and not recursive and previous.unchanged(dir_mtime_ns):
+                            ui.finish('window.cleaningComplete(0, 0)')
+                            return
+                    prefix_len = len(os.path.join(downloads_path, ''))
+
+                    date = time.strftime("%Y-%m-%d %H:%M:%S")
+                    journal = self._open_journal(date, downloads_path)
+                    # Inodes only for the incremental carry-over (a stat per file on Windows)
+                    files = self._iter_target_files(downloads_path, compiled_rules, with_inode=incremental)
+                    if isinstance(files, list):
+                        total = len(files)
+                    else:
+                        # Recursive walk: a counting pass keeps progress accurate without holding the tree
+                        total = sum(1 for _ in self._iter_target_files(downloads_path, compiled_rules))
                     
-                    total = len(files)
+                    done = [0]
+                    progress_lock = threading.Lock()
                     
-                    for i, filename in enumerate(files):
-                        if self.stop_cleaning:
-                            webview.windows[0].evaluate_js('window.cleaningStopped()')
+                    def advance():
+                        with progress_lock:
+                            done[0] += 1
+                            ui.progress(min(100, (done[0] / max(total, 1)) * 100))
+                    
+                    def on_moved(future, seq, file_path, filename, target_folder):
+                        # Runs on the mover thread once the move finished (or failed)
+                        if future.cancelled():
                             return
+                        error = future.exception()
+                        if error is None:
+                            target_path = future.result()
+                            if target_path is None:
+                                return # Stopped before this file was moved
+                            try:
+                                journal.record(file_path, target_path, seq)
+                            except Exception as e:
+                                # Moved, but it won't be in history: report it rather than lose it silently
+                                error = OSError(f"Moved to {target_path} but not journaled: {e}")
+                        if error is None:
+                            with progress_lock:
+                                counts["moved"] += 1
+                            log_entry = {
+                                "file": os.path.basename(target_path),
+                                "category": target_folder,
+                                "status": "Moved"
+                            }
+                        else:
+                            with progress_lock:
+                                counts["errors"] += 1
+                            log_entry = {
+                                "file": filename,
+                                "category": target_folder,
+                                "status": "Error",
+                                "details": str(error)
+                            }
+                        ui.log(log_entry)
+                        advance()
+                    
+                    executor = MoveExecutor(should_stop=lambda: self.stop_cleaning)
+                    seq = 0
+                    
+                    for entry in files:
+                        if self.stop_cleaning:
+                            break
+
+                        filename = entry.name
+
+                        if incremental:
+                            key = entry.path[prefix_len:]
+                            known = previous.entries.get(key) if previous is not None else None
+                            if known is not None and entry.inode is not None and known[0] == entry.inode:
+                                # Same file, same rules: same decision as last time
+                                seen[key] = known
+                                advance()
+                                continue
+                            try:
+                                st = os.stat(entry.path)
+                            except OSError:
+                                advance()
+                                continue # Gone since the listing
+                            state = (st.st_ino, st.st_size, st.st_mtime_ns)
 
                         # Check filter logic
-                        should_skip = False
-                        
-                        if filter_mode == "exclude":
-                            # Exclude if matches ignore pattern
-                            for pattern in ignore_patterns:
-                                if fnmatch.fnmatch(filename, pattern):
-                                    should_skip = True
-                                    break
-                        else: # include mode
-                            # Skip UNLESS it matches include pattern
-                            matches_include = False
-                            for pattern in include_patterns:
-                                if fnmatch.fnmatch(filename, pattern):
-                                    matches_include = True
-                                    break
-                            if not matches_include:
-                                should_skip = True
+                        should_skip = not file_filter.allows(filename)
                         
                         if should_skip:
-                            progress = ((i + 1) / total) * 100
-                            webview.windows[0].evaluate_js(f'window.updateProgress({progress})')
+                            if incremental:
+                                seen[key] = state + ("filtered",)
+                            advance()
                             continue
 
-                        file_path = os.path.join(downloads_path, filename)
-                        _, ext = os.path.splitext(filename)
-                        ext = ext.lower().lstrip('.') # 'pdf' not '.pdf'
-                        
-                        target_folder = None
-                        
-                        # Match against rules
-                        for rule in rules:
-                            # Check extensions (flexible input handling)
-                            rule_exts = [e.lower().lstrip('.') for e in rule.get('extensions', [])]
-                            
-                            if ext in rule_exts:
-                                target_folder = rule.get('folder', 'Misc')
-                                
-                                # Handle dynamic pattern "($)" extraction
-                                pattern = rule.get('filename_pattern', '')
-                                if pattern and '($)' in pattern:
-                                    # Convert "date($)file" to regex "date(.*)file"
-                                    parts = pattern.split('($)')
-                                    safe_parts = [re.escape(p) for p in parts]
-                                    # Use (.*) to capture
-                                    regex_pattern = '(.*)'.join(safe_parts)
-                                    
-                                    extracted = None
-                                    
-                                    # 1. Try match against base filename first (avoids capturing extension)
-                                    base_name, _ = os.path.splitext(filename)
-                                    match = re.search(regex_pattern, base_name)
-                                    if match:
-                                        groups = match.groups()
-                                        if groups:
-                                            extracted = " ".join([g.strip() for g in groups if g])
-                                            
-                                    # 2. If no match, try full filename (in case pattern includes extension)
-                                    if not extracted:
-                                        match = re.search(regex_pattern, filename)
-                                        if match:
-                                            groups = match.groups()
-                                            if groups:
-                                                extracted = " ".join([g.strip() for g in groups if g])
-
-                                    if extracted:
-                                        # Append extracted value as subfolder
-                                        target_folder = os.path.join(target_folder, extracted)
-                                
-                                break # Stop at first matching rule
+                        file_path = entry.path
+                        target_folder = compiled_rules.classify(filename)
                         
                         if not target_folder:
                              # No rule matched, skip or move to Misc? 
                              # Let's skip for now to be safe, or we can have a "Misc" rule
-                             progress = ((i + 1) / total) * 100
-                             webview.windows[0].evaluate_js(f'window.updateProgress({progress})')
+                             if incremental:
+                                 seen[key] = state + ("no_rule",)
+                             advance()
                              continue
 
                         # Determine target directory (Absolute or Relative)
@@ -986,86 +3462,84 @@ def create_app():
                             target_dir = target_folder
                         else:
                             target_dir = os.path.join(downloads_path, target_folder)
-                            
-                        if not os.path.exists(target_dir):
-                            os.makedirs(target_dir)
-                            
-                        target_path = os.path.join(target_dir, filename)
-                        
-                        # Handle duplicates
-                        if os.path.exists(target_path):
-                            base, extension = os.path.splitext(filename)
-                            counter = 1
-                            while os.path.exists(os.path.join(target_dir, f"{base}_{counter}{extension}")):
-                                counter += 1
-                            target_path = os.path.join(target_dir, f"{base}_{counter}{extension}")
-                            filename = f"{base}_{counter}{extension}"
-
-                        try:
-                            shutil.move(file_path, target_path)
-                            moved_count += 1
-                            
-                            undo_log.append({
-                                "original_path": file_path,
-                                "new_path": target_path
-                            })
-                            
-                            log_entry = {
-                                "file": filename,
-                                "category": target_folder,
-                                "status": "Moved"
-                            }
-                            webview.windows[0].evaluate_js(f'window.logAction({json.dumps(log_entry)})')
-                            
-                        except Exception as e:
-                            errors += 1
-                            log_entry = {
-                                "file": filename,
-                                "category": target_folder,
-                                "status": "Error",
-                                "details": str(e)
-                            }
-                            webview.windows[0].evaluate_js(f'window.logAction({json.dumps(log_entry)})')
                         
-                        # Update progress
-                        progress = ((i + 1) / total) * 100
-                        webview.windows[0].evaluate_js(f'window.updateProgress({progress})')
-                        
-                        # Add a tiny delay to make it look cool/visualize the process
-                        time.sleep(0.05)
+                        # Folder creation, duplicate naming and the move happen in MoveExecutor
+                        future = executor.submit(file_path, target_dir, filename)
+                        future.add_done_callback(lambda f, seq=seq, file_path=file_path, filename=filename, target_folder=target_folder: on_moved(f, seq, file_path, filename, target_folder))
+                        seq += 1
+                    
+                    executor.shutdown(cancel=self.stop_cleaning)
+                    stopped = self.stop_cleaning
+                    moved_count, errors = counts["moved"], counts["errors"]
 
-                    # Save history
+                    # Save history, streamed back from the journal instead of kept in memory
+                    # (completion order there; each move's seq puts it back in request order)
                     if moved_count > 0:
-                        session_data = {
-                            "id": int(time.time()),
-                            "date": time.strftime("%Y-%m-%d %H:%M:%S"),
-                            "path": downloads_path,
-                            "moves": undo_log
-                        }
-                        
-                        history = []
-                        if os.path.exists(history_file):
-                            try:
-                                with open(history_file, 'r') as f:
-                                    history = json.load(f)
-                            except:
-                                pass
-                        
-                        history.append(session_data)
-                        
-                        with open(history_file, 'w') as f:
-                            json.dump(history, f)
+                        self._get_history_store().add_session(date, downloads_path, journal.moves())
+                    journal.discard()
+
+                    if incremental:
+                        # A stopped or recursive run can't vouch for the whole folder
+                        trusted_mtime = None if stopped or recursive else dir_mtime_ns
+                        snapshot_store.save(downloads_path, FolderSnapshot(signature, taken_at_ns, trusted_mtime, seen), previous)
                         
-                    webview.windows[0].evaluate_js(f'window.cleaningComplete({moved_count}, {errors})')
+                    # Moves done before a stop are still saved above, so they can be undone
+                    if stopped:
+                        ui.finish('window.cleaningStopped()')
+                    else:
+                        ui.finish(f'window.cleaningComplete({moved_count}, {errors})')
 
                 except Exception as e:
-                    webview.windows[0].evaluate_js(f'window.cleaningError("{str(e)}")')
+                    ui.finish(f'window.cleaningError("{str(e)}")')
 
-            threading.Thread(target=run_organizer).start()
+            threading.Thread(target=self._exclusive(run_organizer)).start()
 
     api = Api()
+    # Moves journaled by a run that never finished become a restorable session
+    recover_journals(journal_dir, api._get_history_store())
+    return api
+
+def create_app():
+    # Determine the path to the web directory
+    if getattr(sys, 'frozen', False):
+        base_path = sys._MEIPASS
+    else:
+        base_path = os.path.dirname(os.path.abspath(__file__))
+    
+    web_dir = os.path.join(base_path, 'web')
+    index_path = os.path.join(web_dir, 'index.html')
+
+    api = create_api()
+    if api.get_watch_mode()["enabled"]:
+        api.start_watch()
     webview.create_window('System Cleaner', url=index_path, js_api=api, width=800, height=600)
     webview.start(debug=False)
+    api._shutdown()
+
+def run_watch_headless(folder=None):
+    """Watch mode without the window (e.g. on a server): python main.py --watch [--folder PATH]"""
+    api = create_api()
+    # Only for this run: the app's saved target folder stays as it is
+    watcher = api.start_watch(os.path.abspath(folder) if folder else None)
+    print(f"Watching {watcher.folder}, press Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        api._shutdown()
 
 if __name__ == '__main__':
-    create_app()
+    # Needed for the extraction worker processes in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
+
+    parser = argparse.ArgumentParser(description="System Cleaner")
+    parser.add_argument("--watch", action="store_true", help="organize new files as they arrive, without the window")
+    parser.add_argument("--folder", help="folder to watch (defaults to the saved target folder)")
+    args, _ = parser.parse_known_args()
+
+    if args.watch:
+        run_watch_headless(args.folder)
+    else:
+        create_app()
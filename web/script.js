@@ -12,6 +12,9 @@ window.addEventListener("pywebviewready", function () {
 
   loadProfiles();
   setupPatternHelp();
+  window.pywebview.api.get_turbo_mode().then((enabled) => {
+    turboMode = enabled;
+  });
 });
 
 function setupPatternHelp() {
@@ -48,12 +51,16 @@ const aiModeSelect = document.getElementById("ai-mode");
 const aiInstructionsInput = document.getElementById("ai-instructions");
 const aiPrioritizeRules = document.getElementById("ai-prioritize-rules");
 const aiRespectIgnore = document.getElementById("ai-respect-ignore");
+const aiStream = document.getElementById("ai-stream");
+const aiDedupe = document.getElementById("ai-dedupe");
+const aiLiveResults = document.getElementById("ai-live-results");
 const aiResultsList = document.getElementById("ai-results-list");
 const aiRiskAck = document.getElementById("ai-risk-ack");
 const aiSelectAll = document.getElementById("ai-select-all");
 
 let currentAiResults = [];
 let isAiScanning = false;
+const ADAPTIVE_PAGE_LIMIT = 50; // Max files considered per call when packing by tokens
 
 aiBtn.addEventListener("click", function () {
   // Load config
@@ -67,10 +74,26 @@ aiBtn.addEventListener("click", function () {
       aiPrioritizeRules.checked = config.prioritize_rules;
     if (config.respect_ignore !== undefined)
       aiRespectIgnore.checked = config.respect_ignore;
+    if (config.stream !== undefined) aiStream.checked = config.stream;
+    if (config.dedupe !== undefined) aiDedupe.checked = config.dedupe;
     if (config.batch_size)
       document.getElementById("ai-batch-size").value = config.batch_size;
     if (config.max_files !== undefined)
       document.getElementById("ai-max-files").value = config.max_files;
+    if (config.token_budget !== undefined)
+      document.getElementById("ai-token-budget").value = config.token_budget;
+    if (config.concurrency)
+      document.getElementById("ai-concurrency").value = config.concurrency;
+    if (config.requests_per_minute !== undefined)
+      document.getElementById("ai-rpm").value = config.requests_per_minute;
+    if (config.content_workers)
+      document.getElementById("ai-content-workers").value =
+        config.content_workers;
+    if (config.content_timeout)
+      document.getElementById("ai-content-timeout").value =
+        config.content_timeout;
+    if (config.summarizer)
+      document.getElementById("ai-summarizer").value = config.summarizer;
   });
 
   // Reset state
@@ -95,6 +118,16 @@ startAiScanBtn.addEventListener("click", async function () {
   const batchSize =
     parseInt(document.getElementById("ai-batch-size").value) || 15;
   const maxFiles = parseInt(document.getElementById("ai-max-files").value) || 0;
+  const tokenBudget =
+    parseInt(document.getElementById("ai-token-budget").value) || 0;
+  const concurrency =
+    parseInt(document.getElementById("ai-concurrency").value) || 1;
+  const requestsPerMinute =
+    parseInt(document.getElementById("ai-rpm").value) || 0;
+  const contentWorkers =
+    parseInt(document.getElementById("ai-content-workers").value) || 4;
+  const contentTimeout =
+    parseInt(document.getElementById("ai-content-timeout").value) || 30;
 
   // Save config
   const config = {
@@ -105,8 +138,16 @@ startAiScanBtn.addEventListener("click", async function () {
     instructions: aiInstructionsInput.value,
     prioritize_rules: aiPrioritizeRules.checked,
     respect_ignore: aiRespectIgnore.checked,
+    stream: aiStream.checked,
+    dedupe: aiDedupe.checked,
     batch_size: batchSize,
     max_files: maxFiles,
+    token_budget: tokenBudget,
+    concurrency: concurrency,
+    requests_per_minute: requestsPerMinute,
+    content_workers: contentWorkers,
+    content_timeout: contentTimeout,
+    summarizer: document.getElementById("ai-summarizer").value,
   };
   window.pywebview.api.save_ai_config(config);
 
@@ -116,6 +157,8 @@ startAiScanBtn.addEventListener("click", async function () {
 
   isAiScanning = true;
   currentAiResults = []; // Clear previous results
+  aiLiveResults.innerHTML = "";
+  liveSuggestionCount = 0;
   let offset = 0;
   let totalProcessed = 0;
 
@@ -128,11 +171,13 @@ startAiScanBtn.addEventListener("click", async function () {
   try {
     while (isAiScanning) {
       // Calculate effective batch size if maxFiles is set
-      let currentBatchSize = batchSize;
+      // With a token budget the backend packs as many of these as fit
+      const pageLimit = tokenBudget > 0 ? ADAPTIVE_PAGE_LIMIT : batchSize;
+      let currentBatchSize = pageLimit;
       if (maxFiles > 0) {
         const remaining = maxFiles - totalProcessed;
         if (remaining <= 0) break;
-        if (remaining < batchSize) currentBatchSize = remaining;
+        if (remaining < pageLimit) currentBatchSize = remaining;
       }
 
       statusMsg.innerText = `Analyzing batch...`;
@@ -143,6 +188,12 @@ startAiScanBtn.addEventListener("click", async function () {
         offset: offset,
         batch_size: currentBatchSize,
       };
+      if (concurrency > 1) {
+        // Backend splits the whole remainder into parallel batches
+        batchConfig.batch_size = batchSize;
+        batchConfig.page_size = maxFiles > 0 ? maxFiles - totalProcessed : 0;
+        subMsg.innerText = `Processed: ${totalProcessed} files. Sending ${concurrency} batches at a time...`;
+      }
       const response = await window.pywebview.api.run_ai_scan(batchConfig);
 
       if (response.error) {
@@ -165,6 +216,14 @@ startAiScanBtn.addEventListener("click", async function () {
         currentAiResults = currentAiResults.concat(response.results);
       }
 
+      if (response.failed_batches && response.failed_batches.length > 0) {
+        alert(
+          "Some batches failed:\n" +
+            response.failed_batches.join("\n") +
+            "\nShowing results from the rest."
+        );
+      }
+
       const processedInBatch = response.processed || 0;
       totalProcessed += processedInBatch;
       offset += processedInBatch; // Increment offset by actual processed count
@@ -195,6 +254,23 @@ startAiScanBtn.addEventListener("click", async function () {
   }
 });
 
+// Streaming: suggestions arrive one by one while a batch is still running
+let liveSuggestionCount = 0;
+
+window.aiSuggestion = function (item) {
+  liveSuggestionCount++;
+  const li = document.createElement("li");
+  li.innerText = `${item.file} → ${item.folder}`;
+  aiLiveResults.insertBefore(li, aiLiveResults.firstChild);
+  // Only keep the latest few visible
+  while (aiLiveResults.children.length > 5) {
+    aiLiveResults.removeChild(aiLiveResults.lastChild);
+  }
+  document
+    .getElementById("ai-step-scanning")
+    .querySelector("h3").innerText = `Received ${liveSuggestionCount} suggestions...`;
+};
+
 function renderAiResults(results) {
   aiResultsList.innerHTML = "";
   results.forEach((item, index) => {
@@ -422,6 +498,11 @@ const textarea = document.getElementById("ignore-list-input");
 const excludeBtn = document.getElementById("filter-mode-exclude");
 const includeBtn = document.getElementById("filter-mode-include");
 const filterDesc = document.getElementById("filter-desc");
+const turboModeCheck = document.getElementById("turbo-mode");
+const recursiveModeCheck = document.getElementById("recursive-mode");
+const recursiveDepthInput = document.getElementById("recursive-depth");
+const incrementalModeCheck = document.getElementById("incremental-mode");
+const watchModeCheck = document.getElementById("watch-mode");
 
 let currentFilterMode = "exclude"; // exclude | include
 
@@ -479,6 +560,17 @@ settingsBtn.addEventListener("click", function () {
   window.pywebview.api.get_filter_mode().then((mode) => {
     updateFilterUI(mode);
   });
+  turboModeCheck.checked = turboMode;
+  window.pywebview.api.get_recursive_mode().then((recursive) => {
+    recursiveModeCheck.checked = recursive.enabled;
+    recursiveDepthInput.value = recursive.max_depth;
+  });
+  window.pywebview.api.get_incremental_mode().then((enabled) => {
+    incrementalModeCheck.checked = enabled;
+  });
+  window.pywebview.api.get_watch_mode().then((watch) => {
+    watchModeCheck.checked = watch.enabled;
+  });
 });
 
 closeBtn.addEventListener("click", function () {
@@ -494,6 +586,16 @@ saveBtn.addEventListener("click", function () {
 
   // Save Mode
   window.pywebview.api.set_filter_mode(currentFilterMode);
+  turboMode = turboModeCheck.checked;
+  window.pywebview.api.set_turbo_mode(turboMode);
+  window.pywebview.api.set_incremental_mode(incrementalModeCheck.checked);
+  window.pywebview.api.set_watch_mode(watchModeCheck.checked);
+  window.pywebview.api
+    .set_recursive_mode(
+      recursiveModeCheck.checked,
+      parseInt(recursiveDepthInput.value) || 10
+    )
+    .then(() => refreshStats());
 
   // Save List
   if (currentFilterMode === "exclude") {
@@ -862,12 +964,78 @@ window.logAction = function (dataStr) {
     data = dataStr;
   }
 
+  addLogItems([data]);
+};
+
+// Batched events from the backend: many log lines + latest progress per call
+window.uiEvents = function (batch) {
+  if (batch.logs && batch.logs.length > 0) {
+    if (turboMode) {
+      addLogItems(batch.logs);
+    } else {
+      // Animate client-side: the backend no longer sleeps between files
+      pendingLogItems.push(...batch.logs);
+      if (!logAnimationFrame)
+        logAnimationFrame = requestAnimationFrame(dripLogItems);
+    }
+  }
+  if (batch.progress !== null && batch.progress !== undefined)
+    window.updateProgress(batch.progress);
+};
+
+const MAX_LOG_ITEMS = 500; // Keep the DOM small on huge runs
+const LOG_ITEMS_PER_FRAME = 3;
+
+let turboMode = false;
+let pendingLogItems = [];
+let logAnimationFrame = null;
+
+function dripLogItems() {
+  addLogItems(pendingLogItems.splice(0, LOG_ITEMS_PER_FRAME));
+  // Don't fall far behind on big runs
+  if (pendingLogItems.length > MAX_LOG_ITEMS) {
+    pendingLogItems = pendingLogItems.slice(-MAX_LOG_ITEMS);
+  }
+  logAnimationFrame = pendingLogItems.length
+    ? requestAnimationFrame(dripLogItems)
+    : null;
+}
+
+// Show anything still waiting for its animation frame
+function flushLogItems() {
+  if (logAnimationFrame) cancelAnimationFrame(logAnimationFrame);
+  logAnimationFrame = null;
+  addLogItems(pendingLogItems);
+  pendingLogItems = [];
+}
+
+// Files the folder watcher organized in the background
+window.watchEvents = function (logs) {
+  addLogItems(logs);
+  refreshStats();
+};
+
+function addLogItems(items) {
+  if (items.length === 0) return;
   const list = document.getElementById("log-list");
 
   // Remove empty state if present
   const empty = list.querySelector(".empty-state");
   if (empty) empty.remove();
 
+  // Newest first, inserted in one go
+  const fragment = document.createDocumentFragment();
+  for (let i = items.length - 1; i >= 0; i--) {
+    fragment.appendChild(createLogItem(items[i]));
+  }
+  list.insertBefore(fragment, list.firstChild);
+
+  while (list.children.length > MAX_LOG_ITEMS) {
+    list.removeChild(list.lastChild);
+  }
+}
+
+function createLogItem(data) {
   const div = document.createElement("div");
   div.className = "log-item";
 
@@ -890,11 +1058,11 @@ window.logAction = function (dataStr) {
         </div>
     `;
 
-  // Add to top
-  list.insertBefore(div, list.firstChild);
-};
+  return div;
+}
 
 window.cleaningComplete = function (moved, errors) {
+  flushLogItems();
   const btn = document.getElementById("clean-btn");
   btn.disabled = false;
   document.getElementById("history-btn").disabled = false;
@@ -911,6 +1079,7 @@ window.cleaningComplete = function (moved, errors) {
 };
 
 window.undoComplete = function (restored) {
+  flushLogItems();
   const btn = document.getElementById("history-btn");
   const cleanBtn = document.getElementById("clean-btn");
 